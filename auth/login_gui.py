@@ -4,6 +4,7 @@ import tkinter as tk
 from tkinter import messagebox
 from string import punctuation
 from auth.password_hash import sha256, verify_password
+from database import db_access
 
 
 db_path = "satellite_database.db"
@@ -123,7 +124,7 @@ class LoginWindow:
         try:
 
             #Connects to database and checks user credentials
-            with sqlite3.connect(db_path) as conn:
+            with db_access.get_connection(db_path) as conn:
                 c = conn.cursor()
 
                 #Retrieve stored password hash for the username
@@ -177,7 +178,7 @@ class LoginWindow:
         try:
             
             #Insets new user into the databse with their credentials
-            with sqlite3.connect(db_path) as conn:
+            with db_access.get_connection(db_path) as conn:
 
                 c = conn.cursor()
                 c.execute("INSERT INTO Users (username, password_hash) VALUES (?, ?)", 
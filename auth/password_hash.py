@@ -1,5 +1,8 @@
 ﻿#Reference: https://github.com/keanemind/python-sha-256/blob/master/sha256.py
 
+import struct
+from operator import add
+
 #Constants
 
 K = [0x428a2f98, 0x71374491, 0xb5c0fbcf, 0xe9b5dba5,
@@ -23,123 +26,221 @@ K = [0x428a2f98, 0x71374491, 0xb5c0fbcf, 0xe9b5dba5,
 def sha256(message):
 
     if isinstance(message, str):
-        message = bytearray(message, "utf-8")
-    elif isinstance(message, bytes):
-        message = bytearray(message)
-    elif not isinstance(message, bytearray):
-        print("Invalid message type")
+        message = message.encode("utf-8")
+    elif not isinstance(message, (bytes, bytearray, memoryview)):
+        raise TypeError(f"sha256 expects str or a bytes-like object, not {type(message).__name__}")
 
-    #Padding
+    return SHA256(message).digest()
 
-    original_length = len(message) * 8
 
-    message.append(0x80)
+#Initial hash values (square roots of first 8 primes)
+H = (0x6a09e667, 0xbb67ae85, 0x3c6ef372, 0xa54ff53a, 0x510e527f, 0x9b05688c, 0x1f83d9ab, 0x5be0cd19)
 
-    while (len(message) * 8 + 64) % 512 != 0:
-        message.append(0x00)
+_block_words = struct.Struct(">16L")
+_digest_words = struct.Struct(">8L")
 
-    message += original_length.to_bytes(8, "big")
 
-    #Hash values (sqaure roots of first 8 primes)
-    
-    h0 = 0x6a09e667
-    h1 = 0xbb67ae85
-    h2 = 0x3c6ef372
-    h3 = 0xa54ff53a
-    h4 = 0x510e527f
-    h5 = 0x9b05688c
-    h6 = 0x1f83d9ab
-    h7 = 0x5be0cd19
+#Incremental SHA-256, same interface as hashlib's: update() with any number of chunks then digest()
+#Only the unfinished tail block is buffered, so files and sockets can be hashed in fixed size pieces
+class SHA256:
 
-    for i in range(0, len(message), 64):
-        block = message[i:i + 64]
+    name = "sha256"
+    block_size = 64
+    digest_size = 32
 
-        schedule_array = []
+    def __init__(self, data=b""):
+        self._state = H
+        self._buffer = bytearray()
+        self._length = 0 #bytes hashed so far
 
-        #First 16 words
-        for t in range(16):
-            schedule_array.append(int.from_bytes(block[t * 4:(t+1) * 4], "big"))
+        if data:
+            self.update(data)
 
+    def update(self, data):
+        if isinstance(data, str):
+            data = data.encode("utf-8")
 
-        #Remaining 48 words
-        for t in range(16, 64):
-            s0 = _sigma0(schedule_array[t-15])
-            s1 = _sigma1(schedule_array[t-2])
-            schedule_array.append((schedule_array[t-16] + s0 + schedule_array[t-7] + s1) & 0xFFFFFFFF)
+        data = memoryview(data).cast("B")
+        self._length += len(data)
+        offset = 0
 
-        #Variables
+        #Top up a partial block from the previous call first
+        if self._buffer:
+            offset = min(64 - len(self._buffer), len(data))
+            self._buffer += data[:offset]
+            if len(self._buffer) < 64:
+                return
+            self._state = _compress(self._state, self._buffer, 0, 64)
+            self._buffer = bytearray()
 
-        a, b, c, d, e, f, g, h = h0, h1, h2, h3, h4, h5, h6, h7
+        #Whole blocks straight from the caller's data, the tail waits for the next call
+        end = offset + (len(data) - offset) // 64 * 64
+        if end > offset:
+            self._state = _compress(self._state, data, offset, end)
+        self._buffer += data[end:]
 
-        #Compression loop
+    #Finishing works on a copy of the state, so more data can still be added afterwards
+    def digest(self):
+        #0x80, zeros up to 56 bytes mod 64, then the message length in bits
+        padding = b"\x80" + bytes((55 - self._length) % 64) + (self._length * 8).to_bytes(8, "big")
+        tail = self._buffer + padding
+        return _digest_words.pack(*_compress(self._state, tail, 0, len(tail)))
 
-        for t in range(64):
-            T1 = (h + _capsigma1(e) + _ch(e, f, g) + K[t] + schedule_array[t]) & 0xFFFFFFFF
-            T2 = (_capsigma0(a) + _maj(a, b, c)) & 0xFFFFFFFF
+    def hexdigest(self):
+        return self.digest().hex()
 
-            h = g
-            g = f
-            f = e
-            e = (d + T1) & 0xFFFFFFFF
-            d = c
-            c = b
-            b = a
-            a = (T1 + T2) & 0xFFFFFFFF
+    def copy(self):
+        other = SHA256()
+        other._state = self._state
+        other._buffer = bytearray(self._buffer)
+        other._length = self._length
+        return other
 
 
-        #Add the compressed part to the hash value
+#Hashes a binary file object (or anything with readinto) in chunk_size pieces through one reused buffer
+def sha256_file(file, chunk_size=64 * 1024):
+    hasher = SHA256()
+    buffer = bytearray(chunk_size)
+    view = memoryview(buffer)
 
-        h0 = (h0 + a) & 0xFFFFFFFF
-        h1 = (h1 + b) & 0xFFFFFFFF
-        h2 = (h2 + c) & 0xFFFFFFFF
-        h3 = (h3 + d) & 0xFFFFFFFF
-        h4 = (h4 + e) & 0xFFFFFFFF
-        h5 = (h5 + f) & 0xFFFFFFFF
-        h6 = (h6 + g) & 0xFFFFFFFF
-        h7 = (h7 + h) & 0xFFFFFFFF
+    while True:
+        n = file.readinto(buffer)
+        if not n:
+            break
+        hasher.update(view[:n])
+
+    return hasher
+
+
+#Message schedules with K[t] already added, one 64 entry list per 64 byte block of data[start:end]
+#Pure Python for the few blocks of a password, where importing NumPy would cost more than it saves
+#a word times 0x100000001 holds two copies of itself, so a rotation is a single shift and each sigma is three shifts
+def _schedule(data, start, end):
+    unpack = _block_words.unpack_from
+    w = [0] * 64
+    kws = []
 
-        #Combine final hash values into a 256-bit result
+    for offset in range(start, end, 64):
+        w[:16] = unpack(data, offset)
 
-    return (
-        h0.to_bytes(4, "big") +
-        h1.to_bytes(4, "big") +
-        h2.to_bytes(4, "big") +
-        h3.to_bytes(4, "big") +
-        h4.to_bytes(4, "big") +
-        h5.to_bytes(4, "big") +
-        h6.to_bytes(4, "big") +
-        h7.to_bytes(4, "big")
-    )
+        #Remaining 48 words
+        for t in range(16, 64):
+            x = w[t - 15] * 0x100000001
+            y = w[t - 2] * 0x100000001
+            w[t] = (w[t - 16] + w[t - 7] + ((x >> 7) ^ (x >> 18) ^ (x >> 35)) + ((y >> 17) ^ (y >> 19) ^ (y >> 42))) & 0xFFFFFFFF
+
+        kws.append(list(map(add, K, w)))
+
+    return kws
 
-#Helpers
 
-#Rotates a 32-bit ine
-def _rotate_right(value, shift, size=32):
-    return ((value >> shift) | (value << (size - shift))) & 0xFFFFFFFF
+#The schedule never depends on the hash state, so for longer inputs every block's is built at once
+#as uint32 columns, where the wrap around of each sum is the 32 bit masking for free
+def _schedule_numpy(data, start, end):
+    import numpy as np
 
+    w = np.empty(((end - start) // 64, 64), dtype=np.uint32)
+    w[:, :16] = np.frombuffer(data, dtype=">u4", count=(end - start) // 4, offset=start).reshape(-1, 16)
 
-def _sigma0(x):
-    return _rotate_right(x, 7) ^ _rotate_right(x, 18) ^ (x >> 3)
+    for t in range(16, 64):
+        x = w[:, t - 15]
+        y = w[:, t - 2]
+        s0 = ((x >> 7) | (x << 25)) ^ ((x >> 18) | (x << 14)) ^ (x >> 3)
+        s1 = ((y >> 17) | (y << 15)) ^ ((y >> 19) | (y << 13)) ^ (y >> 10)
+        w[:, t] = w[:, t - 16] + w[:, t - 7] + s0 + s1
 
+    w += np.array(K, dtype=np.uint32)
+    return w.tolist()
 
-def _sigma1(x):
-    return _rotate_right(x, 17) ^ _rotate_right(x, 19) ^ (x >> 10)
 
+#Inputs of at least this many bytes take the NumPy schedule, in batches of at most _numpy_batch bytes
+_numpy_threshold = 8 * 64
+_numpy_batch = 64 * 1024
 
-def _capsigma0(x):
-    return _rotate_right(x, 2) ^ _rotate_right(x, 13) ^ _rotate_right(x, 22)
 
+#Compression function over the 64 byte blocks of data[start:end] (end - start is a multiple of 64)
+def _compress(state, data, start, end):
+    if end - start < _numpy_threshold:
+        return _rounds(state, _schedule(data, start, end))
 
-def _capsigma1(x):
-    return _rotate_right(x, 6) ^ _rotate_right(x, 11) ^ _rotate_right(x, 25)
+    for offset in range(start, end, _numpy_batch):
+        state = _rounds(state, _schedule_numpy(data, offset, min(offset + _numpy_batch, end)))
+    return state
 
 
-def _ch(x, y, z):
-    return (x & y) ^ (~x & z)
+#The 64 rounds for each precomputed schedule in kws
+#Written for CPython, where every operation on a 32 bit int costs far more than the arithmetic itself:
+# - no helper calls and the rotations are inline, using the same doubled words as the schedule;
+#   the bits left above 32 never reach the low word of a sum and are masked off once per round
+# - the rounds are unrolled by 8, each round renaming the working variables instead of shuffling all eight of them
+def _rounds(state, kws):
+    h0, h1, h2, h3, h4, h5, h6, h7 = state
 
+    for kw in kws:
+        a, b, c, d, e, f, g, h = h0, h1, h2, h3, h4, h5, h6, h7
+
+        #Compression loop, eight rounds per pass with ch and maj in their reduced forms
+        #each round only writes the words in the d and h roles, the next round reads every role moved along by one
+        for t in range(0, 64, 8):
+            E = e * 0x100000001
+            T1 = h + ((E >> 6) ^ (E >> 11) ^ (E >> 25)) + (g ^ (e & (f ^ g))) + kw[t]
+            A = a * 0x100000001
+            d = (d + T1) & 0xFFFFFFFF
+            h = (T1 + ((A >> 2) ^ (A >> 13) ^ (A >> 22)) + ((a & b) | (c & (a | b)))) & 0xFFFFFFFF
+
+            E = d * 0x100000001
+            T1 = g + ((E >> 6) ^ (E >> 11) ^ (E >> 25)) + (f ^ (d & (e ^ f))) + kw[t + 1]
+            A = h * 0x100000001
+            c = (c + T1) & 0xFFFFFFFF
+            g = (T1 + ((A >> 2) ^ (A >> 13) ^ (A >> 22)) + ((h & a) | (b & (h | a)))) & 0xFFFFFFFF
+
+            E = c * 0x100000001
+            T1 = f + ((E >> 6) ^ (E >> 11) ^ (E >> 25)) + (e ^ (c & (d ^ e))) + kw[t + 2]
+            A = g * 0x100000001
+            b = (b + T1) & 0xFFFFFFFF
+            f = (T1 + ((A >> 2) ^ (A >> 13) ^ (A >> 22)) + ((g & h) | (a & (g | h)))) & 0xFFFFFFFF
+
+            E = b * 0x100000001
+            T1 = e + ((E >> 6) ^ (E >> 11) ^ (E >> 25)) + (d ^ (b & (c ^ d))) + kw[t + 3]
+            A = f * 0x100000001
+            a = (a + T1) & 0xFFFFFFFF
+            e = (T1 + ((A >> 2) ^ (A >> 13) ^ (A >> 22)) + ((f & g) | (h & (f | g)))) & 0xFFFFFFFF
+
+            E = a * 0x100000001
+            T1 = d + ((E >> 6) ^ (E >> 11) ^ (E >> 25)) + (c ^ (a & (b ^ c))) + kw[t + 4]
+            A = e * 0x100000001
+            h = (h + T1) & 0xFFFFFFFF
+            d = (T1 + ((A >> 2) ^ (A >> 13) ^ (A >> 22)) + ((e & f) | (g & (e | f)))) & 0xFFFFFFFF
+
+            E = h * 0x100000001
+            T1 = c + ((E >> 6) ^ (E >> 11) ^ (E >> 25)) + (b ^ (h & (a ^ b))) + kw[t + 5]
+            A = d * 0x100000001
+            g = (g + T1) & 0xFFFFFFFF
+            c = (T1 + ((A >> 2) ^ (A >> 13) ^ (A >> 22)) + ((d & e) | (f & (d | e)))) & 0xFFFFFFFF
+
+            E = g * 0x100000001
+            T1 = b + ((E >> 6) ^ (E >> 11) ^ (E >> 25)) + (a ^ (g & (h ^ a))) + kw[t + 6]
+            A = c * 0x100000001
+            f = (f + T1) & 0xFFFFFFFF
+            b = (T1 + ((A >> 2) ^ (A >> 13) ^ (A >> 22)) + ((c & d) | (e & (c | d)))) & 0xFFFFFFFF
+
+            E = f * 0x100000001
+            T1 = a + ((E >> 6) ^ (E >> 11) ^ (E >> 25)) + (h ^ (f & (g ^ h))) + kw[t + 7]
+            A = b * 0x100000001
+            e = (e + T1) & 0xFFFFFFFF
+            a = (T1 + ((A >> 2) ^ (A >> 13) ^ (A >> 22)) + ((b & c) | (d & (b | c)))) & 0xFFFFFFFF
+
+        #Add the compressed part to the hash value
+        h0 = (h0 + a) & 0xFFFFFFFF
+        h1 = (h1 + b) & 0xFFFFFFFF
+        h2 = (h2 + c) & 0xFFFFFFFF
+        h3 = (h3 + d) & 0xFFFFFFFF
+        h4 = (h4 + e) & 0xFFFFFFFF
+        h5 = (h5 + f) & 0xFFFFFFFF
+        h6 = (h6 + g) & 0xFFFFFFFF
+        h7 = (h7 + h) & 0xFFFFFFFF
 
-def _maj(x, y, z):
-    return (x & y) ^ (x & z) ^ (y & z)
+    return h0, h1, h2, h3, h4, h5, h6, h7
 
 
 
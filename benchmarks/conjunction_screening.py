@@ -0,0 +1,46 @@
+import sys
+import time
+import numpy as np
+from propagator import conjunctions, n_orbits
+
+#Times all-pairs conjunction screening of a synthetic catalog
+#Run from the repository root with: python -m benchmarks.conjunction_screening [n_objects] [hours] [workers]
+
+n_objects = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+hours = float(sys.argv[2]) if len(sys.argv) > 2 else 24.0
+workers = int(sys.argv[3]) if len(sys.argv) > 3 else None
+
+dt = 10.0
+threshold = 5.0 #km
+
+
+#Roughly catalog shaped population: mostly LEO with MEO, GEO and highly elliptical orbits
+def synthetic_catalog(n, seed=0):
+    rng = np.random.default_rng(seed)
+    regime = rng.choice(4, size=n, p=[0.8, 0.07, 0.08, 0.05])
+
+    a = np.select([regime == 0, regime == 1, regime == 2],
+                  [rng.uniform(6700, 8400, n), rng.uniform(20000, 30000, n), rng.normal(42164, 20, n)],
+                  rng.uniform(24000, 26000, n))
+    e = np.select([regime == 3], [rng.uniform(0.6, 0.73, n)], rng.uniform(0, 0.01, n))
+    i = np.select([regime == 2], [rng.uniform(0, 15, n)], rng.uniform(0, 100, n))
+
+    coes = np.column_stack([a, e, i, rng.uniform(0, 360, n), rng.uniform(0, 360, n), rng.uniform(0, 360, n)])
+    return n_orbits.coes2rv_batch(coes, deg=True)
+
+
+if __name__ == "__main__":
+
+    r0s, v0s = synthetic_catalog(n_objects)
+    pairs = n_objects * (n_objects - 1) // 2
+
+    start = time.perf_counter()
+    events = conjunctions.screen_catalog(r0s, v0s, duration=hours * 3600.0, dt=dt, threshold=threshold, workers=workers)
+    elapsed = time.perf_counter() - start
+
+    print(f"{n_objects} objects ({pairs:.3g} pairs), {hours:g} h at dt = {dt:g} s, threshold {threshold:g} km")
+    print(f"{len(events)} conjunctions in {elapsed:.1f} s")
+
+    for event in events[np.argsort(events["miss_distance"])][:10]:
+        print(f"  {event['object_1']:6d} {event['object_2']:6d}  TCA {event['tca']:9.1f} s  "
+              f"miss {event['miss_distance']:7.3f} km  {event['relative_speed']:6.2f} km/s")
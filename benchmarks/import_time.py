@@ -0,0 +1,73 @@
+import os
+import re
+import subprocess
+import sys
+
+#Import time profile of the application's entry points, parsed from python -X importtime
+#Every module is imported in a fresh interpreter, repeats times, and the fastest run is reported
+#Run from the repository root with: python -m benchmarks.import_time [repeats] [top] [modules...]
+
+repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 3
+top = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+modules = sys.argv[3:] or ["auth.login_gui", "main", "gui.main_system", "skyfield_calculations.orbital_calculations"]
+
+repo_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+#import time:       self [us] |  cumulative | imported package
+line_pattern = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|( *)(\S+)")
+
+
+#Imports module in a new interpreter, returns the (package, self_us, cumulative_us, depth) lines of its
+#import tree, the module itself last (interpreter start up imports such as site are left out)
+def profile_import(module):
+    env = dict(os.environ, PYTHONPATH=repo_root)
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                            cwd=repo_root, env=env, capture_output=True, text=True)
+
+    if result.returncode != 0:
+        print(f"Importing {module} failed:\n{result.stderr.strip().splitlines()[-1]}")
+        return None
+
+    lines = []
+    for line in result.stderr.splitlines():
+        match = line_pattern.match(line)
+        if match:
+            self_us, cumulative_us, indent, package = match.groups()
+            lines.append((package, int(self_us), int(cumulative_us), (len(indent) - 1) // 2))
+
+    #a package is reported after everything it imported, so the tree is the run of deeper lines before it
+    end = max(k for k, line in enumerate(lines) if line[0] == module)
+    start = end
+    while start > 0 and lines[start - 1][3] > 0:
+        start -= 1
+
+    return lines[start:end + 1]
+
+
+#Fastest of several runs, judged by the module's own cumulative time
+def best_profile(module, repeats):
+    best = None
+    for _ in range(repeats):
+        profile = profile_import(module)
+        if profile is None:
+            return None
+        if best is None or profile[-1][2] < best[-1][2]:
+            best = profile
+    return best
+
+
+if __name__ == "__main__":
+
+    for module in modules:
+        profile = best_profile(module, repeats)
+        if profile is None:
+            continue
+
+        total = profile[-1][2]
+        print(f"{module}: {total / 1000:.1f} ms, {len(profile)} modules imported")
+
+        #Slowest packages imported directly by the module
+        direct = [(cumulative, package) for package, self_us, cumulative, depth in profile if depth == 1]
+        for cumulative, package in sorted(direct, reverse=True)[:top]:
+            print(f"  {cumulative / 1000:8.1f} ms  {cumulative / total:6.1%}  {package}")
+        print()
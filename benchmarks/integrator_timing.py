@@ -0,0 +1,42 @@
+import time
+import numpy as np
+from propagator.orbit_propagator import OrbitPropagator
+
+#Compares the per-dt LSODA loop against the dense output integrators
+#Run from the repository root with: python -m benchmarks.integrator_timing
+
+#ISS-like orbit: [a, e, i, ta, aop, raan]
+coes = [6778.0, 0.0005, 51.6, 0.0, 0.0, 0.0]
+tspan = 24 * 3600.0
+dt = 10.0 #the GUI's output spacing
+
+cases = [
+    ("lsoda (ode.integrate per dt)", "lsoda", {}),
+    ("rk4 (h = 30 s)", "rk4", {"step_size": 30.0}),
+    ("rk45 (rtol = 1e-9)", "rk45", {}),
+    ("dop853 (rtol = 1e-9)", "dop853", {}),
+    ("kepler (closed form)", "kepler", {}),
+]
+
+
+def run_case(integrator, options):
+    op = OrbitPropagator(coes, tspan, dt, coes=True, integrator=integrator, integrator_options=options)
+
+    start = time.perf_counter()
+    op.propagate_orbit()
+    elapsed = time.perf_counter() - start
+
+    return op, elapsed
+
+
+if __name__ == "__main__":
+
+    #the closed form solution is the reference for position error
+    reference, _ = run_case("kepler", {})
+
+    print(f"{'integrator':32s} {'time (s)':>10s} {'max |dr| (km)':>15s}")
+
+    for label, integrator, options in cases:
+        op, elapsed = run_case(integrator, options)
+        error = np.max(np.linalg.norm(op.rs - reference.rs, axis=1))
+        print(f"{label:32s} {elapsed:10.4f} {error:15.3e}")
@@ -0,0 +1,89 @@
+import sys
+import time
+import numpy as np
+from sgp4.api import Satrec, WGS72
+from skyfield.api import EarthSatellite, wgs84
+from skyfield_calculations import timescale
+from skyfield_calculations.pass_prediction import PassPredictor, seconds_per_day
+
+#Compares the coarse grid + root finding pass predictor with naive per-second elevation sampling
+#Run from the repository root with: python -m benchmarks.pass_prediction [satellites] [stations] [hours]
+
+n_satellites = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+n_stations = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+hours = float(sys.argv[3]) if len(sys.argv) > 3 else 24.0
+
+ts = timescale.get_timescale()
+t0 = ts.utc(2024, 3, 1)
+
+
+#LEO satellites built directly from elements so the benchmark runs offline
+def synthetic_satellites(n, seed=0):
+    rng = np.random.default_rng(seed)
+    epoch = t0.tt - 2433281.5 #sgp4 epochs count days from 1949 December 31 00:00 UT
+
+    satellites = []
+    for k in range(n):
+        satrec = Satrec()
+        satrec.sgp4init(WGS72, 'i', 90000 + k, epoch, 2.8e-5, 0.0, 0.0,
+                        rng.uniform(0.0, 0.01), #eccentricity
+                        np.radians(rng.uniform(0, 360)), #argument of perigee
+                        np.radians(rng.uniform(40, 100)), #inclination
+                        np.radians(rng.uniform(0, 360)), #mean anomaly
+                        rng.uniform(14.0, 15.8) * 2 * np.pi / 1440.0, #mean motion (rad/min)
+                        np.radians(rng.uniform(0, 360))) #right ascension
+        satellites.append(EarthSatellite.from_satrec(satrec, ts))
+
+    return satellites
+
+
+def synthetic_stations(n, seed=1):
+    rng = np.random.default_rng(seed)
+    return [wgs84.latlon(rng.uniform(-60, 70), rng.uniform(-180, 180), elevation_m=rng.uniform(0, 2000)) for k in range(n)]
+
+
+#Elevation every second for each (station, satellite) pair, crossings to the nearest second
+def naive_passes(satellites, stations, min_elevation=0.0):
+    times = ts.tt_jd(t0.tt + np.arange(int(hours * 3600) + 1) / seconds_per_day)
+    rises = []
+
+    for g, station in enumerate(stations):
+        for s, satellite in enumerate(satellites):
+            alt, _, _ = (satellite - station).at(times).altaz()
+            above = alt.degrees > min_elevation
+            for k in np.nonzero(~above[:-1] & above[1:])[0]:
+                rises.append((g, s, times.tt[k + 1]))
+
+    return rises
+
+
+if __name__ == "__main__":
+
+    satellites = synthetic_satellites(n_satellites)
+    stations = synthetic_stations(n_stations)
+    print(f"{n_satellites} satellites x {n_stations} stations over {hours:g} h")
+
+    predictor = PassPredictor(satellites, stations)
+    start = time.perf_counter()
+    passes = predictor.predict(t0, duration_hours=hours)
+    grid_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    naive = naive_passes(satellites, stations)
+    naive_time = time.perf_counter() - start
+
+    print(f"coarse grid + root finding: {grid_time:7.2f} s  {len(passes)} passes")
+    print(f"per-second sampling:        {naive_time:7.2f} s  {len(naive)} rises")
+
+    #the per-second rise is the first whole second above the horizon
+    found = passes[~np.isnan(passes["rise"])]
+    errors = []
+    for g, s, rise in naive:
+        match = found[(found["station"] == g) & (found["satellite"] == s)]
+        if len(match):
+            errors.append(np.min(np.abs(match["rise"] - rise)) * seconds_per_day)
+
+    #a rise with no prediction nearby belongs to a grazing pass shorter than the grid step
+    errors = np.array(errors)
+    matched = errors[errors < 2.0]
+    print(f"matched {len(matched)} of {len(naive)} rises, max difference {matched.max(initial=0.0):.2f} s")
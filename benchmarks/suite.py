@@ -0,0 +1,393 @@
+import argparse
+import gc
+import json
+import os
+import platform
+import runpy
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+import numpy as np
+
+#Benchmark suite for the hot paths: propagation, orbital element maths, TLE parsing, password hashing and
+#the SQLite reads and writes behind tracking a satellite. Runs fully offline, the TLE catalog is generated
+#and the database is a throwaway copy of the real schema in a temporary working directory.
+#
+#Run from the repository root with:
+#  python -m benchmarks.suite -o results.json                      write results
+#  python -m benchmarks.suite --baseline results.json              compare against stored results
+#  python -m benchmarks.suite -k sha256 --baseline results.json    only the cases matching a substring
+#A case whose median time per call is slower than the baseline by more than the threshold is a regression,
+#and the exit status is 1 when there is any
+
+#name -> factory returning (fn, amount, unit), fn is timed and amount is the work done per call
+#(bytes, records, ...) for the throughput column, or None
+cases = {}
+
+
+def benchmark(name):
+    def register(factory):
+        cases[name] = factory
+        return factory
+    return register
+
+
+#Fixtures
+
+#Deterministic 3LE catalog text with valid checksums, LEO to GEO mean motions
+def synthetic_tle_catalog(n, seed=0):
+    rng = np.random.default_rng(seed)
+
+    def checksum(line):
+        return sum(int(c) if c.isdigit() else c == '-' for c in line) % 10
+
+    lines = []
+    for k in range(n):
+        norad_id = 10000 + k
+        line1 = f"1 {norad_id:05d}U 24001A   24061.{rng.integers(0, 10**8):08d}  .00001000  00000-0  10000-3 0  999"
+        line2 = (f"2 {norad_id:05d} {rng.uniform(0, 180):8.4f} {rng.uniform(0, 360):8.4f} {rng.integers(0, 10**7):07d} "
+                 f"{rng.uniform(0, 360):8.4f} {rng.uniform(0, 360):8.4f} {rng.uniform(1.0, 16.0):11.8f}{rng.integers(0, 10**5):5d}")
+        lines += [f"SATELLITE {norad_id}", line1 + str(checksum(line1)), line2 + str(checksum(line2))]
+
+    return "\n".join(lines) + "\n"
+
+
+#Database with the application's schema in the current working directory, seeded with satellites,
+#their element sets and a user who has favourited some of them
+def seed_database(records, n_favourites=50):
+    from database import db_access
+    from skyfield_calculations.tle_fetcher import tle_epoch_iso
+
+    runpy.run_module("database.create_tables")
+
+    with db_access.get_connection() as conn:
+        conn.execute("INSERT OR IGNORE INTO Users (username, password_hash) VALUES ('benchmark', '')")
+        user_id = conn.execute("SELECT user_id FROM Users WHERE username = 'benchmark'").fetchone()[0]
+
+    db_access.bulk_insert("Satellites", ["norad_id", "satellite_name"],
+                          [(norad_id, name) for norad_id, name, line1, line2 in records], or_ignore=True)
+    db_access.bulk_insert("TLE_Data", ["norad_id", "tle_line1", "tle_line2", "epoch_date"],
+                          [(norad_id, line1, line2, tle_epoch_iso(line1)) for norad_id, name, line1, line2 in records],
+                          or_ignore=True)
+    db_access.bulk_insert("User_Favourites", ["user_id", "norad_id"],
+                          [(user_id, norad_id) for norad_id, name, line1, line2 in records[:n_favourites]], or_ignore=True)
+
+
+#Stand in for the GUI object, the database methods only need the logged in username
+class BenchmarkUser:
+    username = "benchmark"
+
+
+#Propagation
+
+def propagation_case(tspan, dt, integrator):
+    def factory():
+        from propagator.orbit_propagator import OrbitPropagator
+        coes = [6778.0, 0.0005, 51.6, 0.0, 0.0, 0.0]
+        op = OrbitPropagator(coes, tspan, dt, coes=True, integrator=integrator)
+        return op.propagate_orbit, op.n_steps, "steps"
+    return factory
+
+
+for label, tspan, dt, integrator in [("1 orbit, dt 10 s", 5560.0, 10.0, "lsoda"),
+                                     ("1 day, dt 60 s", 86400.0, 60.0, "lsoda"),
+                                     ("1 day, dt 10 s", 86400.0, 10.0, "lsoda"),
+                                     ("1 day, dt 10 s", 86400.0, 10.0, "dop853"),
+                                     ("7 days, dt 60 s", 7 * 86400.0, 60.0, "dop853")]:
+    benchmark(f"propagate_orbit[{integrator}, {label}]")(propagation_case(tspan, dt, integrator))
+
+
+#Orbital elements
+
+@benchmark("coes2rv")
+def bench_coes2rv():
+    from propagator import n_orbits
+    coes = [6778.0, 0.0005, 51.6, 30.0, 40.0, 50.0]
+    return lambda: n_orbits.coes2rv(coes, deg=True), 1, "elements"
+
+
+@benchmark("ecc_anomaly[newton, scalar]")
+def bench_ecc_anomaly_scalar():
+    from propagator import n_orbits
+    return lambda: n_orbits.ecc_anomaly([1.2, 0.3], "newton"), 1, "solves"
+
+
+@benchmark("ecc_anomaly[newton, 10000]")
+def bench_ecc_anomaly_newton():
+    from propagator import n_orbits
+    rng = np.random.default_rng(0)
+    Me, e = rng.uniform(0, 2 * np.pi, 10000), rng.uniform(0, 0.9, 10000)
+    return lambda: n_orbits.ecc_anomaly([Me, e], "newton"), Me.size, "solves"
+
+
+@benchmark("ecc_anomaly[tae, 10000]")
+def bench_ecc_anomaly_tae():
+    from propagator import n_orbits
+    rng = np.random.default_rng(0)
+    ta, e = rng.uniform(0, 2 * np.pi, 10000), rng.uniform(0, 0.9, 10000)
+    return lambda: n_orbits.ecc_anomaly([ta, e], "tae"), ta.size, "solves"
+
+
+#TLE parsing
+
+@benchmark("parse_tle_catalog[20000]")
+def bench_parse_tle_catalog():
+    from skyfield_calculations import tle_fetcher
+    text = synthetic_tle_catalog(20000)
+    return lambda: tle_fetcher.parse_tle_catalog(text), len(text), "bytes"
+
+
+@benchmark("tle_parser[20000]")
+def bench_tle_parser():
+    from skyfield_calculations import tle_fetcher
+    records = tle_fetcher.parse_tle_catalog(synthetic_tle_catalog(20000))
+
+    def parse_all():
+        for norad_id, name, line1, line2 in records:
+            tle_fetcher.tle_parser(line1, line2)
+
+    return parse_all, len(records), "records"
+
+
+#Password hashing
+
+@benchmark("sha256[16 B]")
+def bench_sha256_password():
+    from auth import password_hash
+    return lambda: password_hash.sha256("correct horse 42"), 16, "bytes"
+
+
+@benchmark("sha256[4 KiB]")
+def bench_sha256_block():
+    from auth import password_hash
+    message = bytes(range(256)) * 16
+    return lambda: password_hash.sha256(message), len(message), "bytes"
+
+
+@benchmark("sha256[64 KiB]")
+def bench_sha256_large():
+    from auth import password_hash
+    message = bytes(range(256)) * 256
+    return lambda: password_hash.sha256(message), len(message), "bytes"
+
+
+@benchmark("sha256_file[64 KiB]")
+def bench_sha256_file():
+    import io
+    from auth import password_hash
+    stream = io.BytesIO(bytes(range(256)) * 256)
+
+    def hash_stream():
+        stream.seek(0)
+        return password_hash.sha256_file(stream, chunk_size=4096).digest()
+
+    return hash_stream, len(stream.getvalue()), "bytes"
+
+
+#SQLite paths used when a satellite is tracked and when favourites are listed
+
+@benchmark("sqlite[store_satellite]")
+def bench_store_satellite():
+    from gui.main_system import MainSystemGUI
+    from skyfield_calculations import tle_fetcher
+    records = tle_fetcher.parse_tle_catalog(synthetic_tle_catalog(500))
+    seed_database(records)
+
+    rows = [(norad_id, name, line1, line2, "LEO (Low Earth Orbit)", 51.6, 0.0005, 15.5, tle_fetcher.tle_epoch_iso(line1))
+            for norad_id, name, line1, line2 in records]
+    index = iter(range(10**9))
+
+    #every call re-stores one of the seeded element sets, as tracking an already cached satellite does
+    return lambda: MainSystemGUI.store_satellite(BenchmarkUser, *rows[next(index) % len(rows)]), 1, "satellites"
+
+
+@benchmark("sqlite[add_to_user_favourites]")
+def bench_add_to_user_favourites():
+    from gui.main_system import MainSystemGUI
+    from skyfield_calculations import tle_fetcher
+    records = tle_fetcher.parse_tle_catalog(synthetic_tle_catalog(500))
+    seed_database(records)
+
+    norad_ids = [norad_id for norad_id, name, line1, line2 in records]
+    index = iter(range(10**9))
+    return lambda: MainSystemGUI.add_to_user_favourites(BenchmarkUser, norad_ids[next(index) % len(norad_ids)]), 1, "satellites"
+
+
+@benchmark("sqlite[get_user_favourites]")
+def bench_get_user_favourites():
+    from gui.main_system import MainSystemGUI
+    from skyfield_calculations import tle_fetcher
+    seed_database(tle_fetcher.parse_tle_catalog(synthetic_tle_catalog(500)))
+    return lambda: MainSystemGUI.get_user_favourites(BenchmarkUser), 1, "queries"
+
+
+#Harness
+
+#Times fn like timeit: calls per round are calibrated so a round lasts at least min_time,
+#the garbage collector is off while timing and the per call time of every round is returned
+def time_case(fn, repeat, min_time):
+    fn()
+
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time or number >= 10**6:
+            break
+        number = max(number * 2, int(number * min_time / max(elapsed, 1e-9)))
+
+    rounds = []
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(repeat):
+            start = time.perf_counter()
+            for _ in range(number):
+                fn()
+            rounds.append((time.perf_counter() - start) / number)
+    finally:
+        if gc_enabled:
+            gc.enable()
+
+    return rounds, number
+
+
+def run_cases(names, repeat, min_time):
+    results = {}
+
+    for name in names:
+        fn, amount, unit = cases[name]()
+        rounds, number = time_case(fn, repeat, min_time)
+        median = statistics.median(rounds)
+
+        results[name] = {
+            "median": median,
+            "min": min(rounds),
+            "max": max(rounds),
+            "stdev": statistics.stdev(rounds) if len(rounds) > 1 else 0.0,
+            "number": number,
+            "rounds": len(rounds),
+            "throughput": amount / median if amount else None,
+            "unit": f"{unit}/s" if amount else None,
+        }
+        print(f"{name:48s} {format_time(median):>10s}  {format_throughput(results[name]):>22s}", flush=True)
+
+    return results
+
+
+def environment():
+    return {
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "numpy": np.__version__,
+        "sqlite": __import__("sqlite3").sqlite_version,
+    }
+
+
+def format_time(seconds):
+    for scale, unit in [(1.0, "s"), (1e-3, "ms"), (1e-6, "us")]:
+        if seconds >= scale:
+            return f"{seconds / scale:.3g} {unit}"
+    return f"{seconds / 1e-9:.3g} ns"
+
+
+def format_throughput(result):
+    if result["throughput"] is None:
+        return ""
+    return f"{result['throughput']:.4g} {result['unit']}"
+
+
+#Compares median times against a baseline report, returns the names of the regressed cases
+def compare(results, baseline, threshold):
+    regressions = []
+
+    print()
+    print(f"{'case':48s} {'baseline':>10s} {'current':>10s} {'change':>8s}")
+
+    for name, result in results.items():
+        reference = baseline["results"].get(name)
+        if reference is None:
+            print(f"{name:48s} {'-':>10s} {format_time(result['median']):>10s} {'new':>8s}")
+            continue
+
+        change = result["median"] / reference["median"] - 1.0
+        flag = ""
+        if change > threshold:
+            flag = "  REGRESSION"
+            regressions.append(name)
+        elif change < -threshold:
+            flag = "  faster"
+
+        print(f"{name:48s} {format_time(reference['median']):>10s} {format_time(result['median']):>10s} {change:+8.1%}{flag}")
+
+    if baseline.get("environment") != environment():
+        print("\nBaseline was recorded on a different environment, timings may not be comparable")
+
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Offline benchmark suite for the satellite tracker's hot paths")
+    parser.add_argument("-o", "--output", help="write the results as JSON to this file")
+    parser.add_argument("-b", "--baseline", help="JSON results of an earlier run to compare against")
+    parser.add_argument("-t", "--threshold", type=float, default=0.1, help="slowdown counted as a regression (default 0.1 = 10%%)")
+    parser.add_argument("-k", "--filter", default="", help="only run cases whose name contains this text")
+    parser.add_argument("-r", "--repeat", type=int, default=5, help="timed rounds per case")
+    parser.add_argument("--min-time", type=float, default=0.2, help="minimum seconds per round")
+    parser.add_argument("--list", action="store_true", help="list the cases and exit")
+    args = parser.parse_args(argv)
+
+    names = [name for name in cases if args.filter in name]
+    if args.list:
+        print("\n".join(names))
+        return 0
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+    output = os.path.abspath(args.output) if args.output else None
+
+    #Relative paths (the database, the trajectory cache) resolve inside a temporary directory,
+    #so the benchmarks never touch the real database
+    from database import db_access
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as workdir:
+        os.chdir(workdir)
+        try:
+            results = run_cases(names, args.repeat, args.min_time)
+        finally:
+            db_access.close_connections()
+            os.chdir(cwd)
+
+    report = {
+        "created": datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+        "environment": environment(),
+        "settings": {"repeat": args.repeat, "min_time": args.min_time},
+        "results": results,
+    }
+
+    if output:
+        with open(output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nResults written to {output}")
+
+    if baseline is not None:
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) beyond {args.threshold:.0%}: {', '.join(regressions)}")
+            return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
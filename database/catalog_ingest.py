@@ -0,0 +1,69 @@
+import sqlite3
+from skyfield_calculations import tle_fetcher
+from database import db_access
+from instrumentation import metrics
+
+db_path = "satellite_database.db"
+
+
+#Converts parsed catalog records into TLE_Data rows straight from the fixed TLE columns
+def tle_rows(records):
+
+    rows = []
+    for norad_id, satellite_name, line1, line2 in records:
+        try:
+            inclination = float(line2[8:16])
+            eccentricity = float("0." + line2[26:33].strip())
+            mean_motion = float(line2[52:63])
+            epoch_date = tle_fetcher.tle_epoch_iso(line1)
+
+        except ValueError:
+            print(f"Skipping malformed TLE for NORAD ID {norad_id}")
+            continue
+
+        rows.append((norad_id, satellite_name, line1, line2, inclination, eccentricity, mean_motion, epoch_date))
+
+    return rows
+
+
+#Upserts every record into Satellites and TLE_Data in a single transaction
+#orbit_type is left empty here and filled in by the catalog classifier
+@metrics.timed("db_write_seconds", "Database write time", {"operation": "store_catalog_tles"})
+def store_catalog_tles(records, db_path=db_path):
+
+    rows = tle_rows(records)
+
+    try:
+        conn = db_access.get_connection(db_path)
+        c = conn.cursor()
+
+        with conn:
+            c.executemany("""INSERT INTO Satellites (norad_id, satellite_name) VALUES (?, ?)
+                          ON CONFLICT(norad_id) DO UPDATE SET satellite_name = excluded.satellite_name""",
+                          [(row[0], row[1]) for row in rows])
+
+            #(norad_id, epoch_date) is unique, so an element set already stored is not inserted again
+            #but re-downloading it still counts as a fresh retrieval
+            c.executemany("""INSERT INTO TLE_Data
+                          (norad_id, tle_line1, tle_line2, inclination, eccentricity, mean_motion, epoch_date)
+                          VALUES (?, ?, ?, ?, ?, ?, ?)
+                          ON CONFLICT(norad_id, epoch_date) DO UPDATE SET retrieved_at = CURRENT_TIMESTAMP""",
+                          [(row[0],) + row[2:] for row in rows])
+
+        return len(rows)
+
+    except sqlite3.Error as e:
+        print(f"Database error: {e}")
+        return 0
+
+
+#Downloads (or reads from path) a whole group file and stores it, one I/O round trip for the catalog
+def ingest_catalog(group="active", path=None, base_url="https://celestrak.org", db_path=db_path):
+
+    records = tle_fetcher.fetch_catalog_tles(group=group, path=path, base_url=base_url)
+
+    if not records:
+        print("No TLE records to ingest")
+        return 0
+
+    return store_catalog_tles(records, db_path=db_path)
@@ -0,0 +1,160 @@
+import sqlite3
+import threading
+
+db_path = "satellite_database.db"
+
+#Shared data access layer
+#Connections are pooled per thread and per database file, so the sqlite3 statement cache on each
+#connection keeps queries prepared between calls. Every new database file is migrated on first use.
+
+#Pragmas applied to every pooled connection
+connection_pragmas = [
+    "PRAGMA foreign_keys = ON",
+    "PRAGMA synchronous = NORMAL", #safe with WAL, avoids an fsync on every commit
+    "PRAGMA temp_store = MEMORY",
+    "PRAGMA cache_size = -20000", #20 MB page cache
+    "PRAGMA mmap_size = 268435456",
+    "PRAGMA busy_timeout = 5000"
+]
+
+statement_cache_size = 256
+
+_local = threading.local()
+_migrated = set()
+_migration_lock = threading.Lock()
+
+
+#Returns this thread's connection to db_path, opening and configuring it on first use
+#Use it as "with get_connection() as conn:" to commit or roll back without closing the connection
+def get_connection(db_path=db_path):
+
+    pool = getattr(_local, "connections", None)
+    if pool is None:
+        pool = _local.connections = {}
+
+    conn = pool.get(db_path)
+    if conn is None:
+        conn = sqlite3.connect(db_path, cached_statements=statement_cache_size)
+        for pragma in connection_pragmas:
+            conn.execute(pragma)
+
+        with _migration_lock:
+            if db_path not in _migrated and migrate(conn):
+                _migrated.add(db_path)
+
+        pool[db_path] = conn
+
+    return conn
+
+
+#Closes this thread's pooled connections
+def close_connections():
+    pool = getattr(_local, "connections", {})
+    for conn in pool.values():
+        conn.close()
+    pool.clear()
+
+
+#Runs one statement for many rows in a single transaction
+def bulk_insert(table, columns, rows, db_path=db_path, or_ignore=False):
+    placeholders = ", ".join("?" for _ in columns)
+    verb = "INSERT OR IGNORE" if or_ignore else "INSERT"
+
+    conn = get_connection(db_path)
+    with conn:
+        cursor = conn.executemany(f"{verb} INTO {table} ({', '.join(columns)}) VALUES ({placeholders})", rows)
+    return cursor.rowcount
+
+
+#Insert or update on a conflict with conflict_columns, update_columns defaults to every other column
+def bulk_upsert(table, columns, rows, conflict_columns, update_columns=None, db_path=db_path):
+    if update_columns is None:
+        update_columns = [column for column in columns if column not in conflict_columns]
+
+    placeholders = ", ".join("?" for _ in columns)
+    if update_columns:
+        action = "DO UPDATE SET " + ", ".join(f"{column} = excluded.{column}" for column in update_columns)
+    else:
+        action = "DO NOTHING"
+
+    conn = get_connection(db_path)
+    with conn:
+        cursor = conn.executemany(f"""INSERT INTO {table} ({', '.join(columns)}) VALUES ({placeholders})
+                                  ON CONFLICT ({', '.join(conflict_columns)}) {action}""", rows)
+    return cursor.rowcount
+
+
+#Schema migrations
+
+def _table_exists(conn, table):
+    return conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (table,)).fetchone() is not None
+
+
+#Version 1: write-ahead logging and indexes for the hot lookups
+def _migration_1(conn):
+    conn.execute("PRAGMA journal_mode = WAL")
+
+    #latest TLE per satellite, duplicate checks and cache lookups
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_tle_norad_epoch ON TLE_Data (norad_id, epoch_date)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_tle_norad_retrieved ON TLE_Data (norad_id, retrieved_at)")
+
+    #favourites joins from the satellite side (UNIQUE(user_id, norad_id) already covers the user side)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_favourites_norad ON User_Favourites (norad_id)")
+
+
+#Version 2: one TLE_Data row per (norad_id, epoch_date) and the Latest_TLE view
+def _migration_2(conn):
+
+    #duplicates collapse into the newest row, keeping the latest retrieval time and any stored classification
+    conn.execute("""UPDATE TLE_Data SET
+                 retrieved_at = (SELECT MAX(d.retrieved_at) FROM TLE_Data d
+                                 WHERE d.norad_id = TLE_Data.norad_id AND d.epoch_date = TLE_Data.epoch_date),
+                 orbit_type = COALESCE(orbit_type, (SELECT d.orbit_type FROM TLE_Data d
+                                                    WHERE d.norad_id = TLE_Data.norad_id AND d.epoch_date = TLE_Data.epoch_date
+                                                    AND d.orbit_type IS NOT NULL
+                                                    ORDER BY d.tle_id DESC LIMIT 1))
+                 WHERE tle_id IN (SELECT MAX(tle_id) FROM TLE_Data GROUP BY norad_id, epoch_date HAVING COUNT(*) > 1)""")
+
+    conn.execute("""DELETE FROM TLE_Data
+                 WHERE tle_id NOT IN (SELECT MAX(tle_id) FROM TLE_Data GROUP BY norad_id, epoch_date)""")
+
+    conn.execute("DROP INDEX IF EXISTS idx_tle_norad_epoch")
+    conn.execute("CREATE UNIQUE INDEX idx_tle_norad_epoch ON TLE_Data (norad_id, epoch_date)")
+
+    #newest element set per satellite, "WHERE norad_id = ?" is pushed down to a single index search
+    conn.execute("""CREATE VIEW IF NOT EXISTS Latest_TLE AS
+                 SELECT tle_id, norad_id, tle_line1, tle_line2, orbit_type, inclination, eccentricity, mean_motion,
+                 MAX(epoch_date) AS epoch_date, retrieved_at
+                 FROM TLE_Data
+                 GROUP BY norad_id""")
+
+
+#(version, migration) pairs applied in order, PRAGMA user_version records the last one applied
+migrations = [
+    (1, _migration_1),
+    (2, _migration_2)
+]
+
+
+#Returns False while the tables have not been created yet
+def migrate(conn):
+
+    #the tables themselves come from database/create_tables.py
+    if not all(_table_exists(conn, table) for table in ("Users", "Satellites", "TLE_Data", "User_Favourites")):
+        return False
+
+    version = conn.execute("PRAGMA user_version").fetchone()[0]
+
+    for target, migration in migrations:
+        if target > version:
+            with conn:
+                migration(conn)
+                conn.execute(f"PRAGMA user_version = {target}")
+
+    return True
+
+
+#Upgrades an existing database file in place: python -m database.db_access
+if __name__ == "__main__":
+    conn = get_connection(db_path)
+    print(f"Database schema version {conn.execute('PRAGMA user_version').fetchone()[0]}")
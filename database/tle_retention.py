@@ -0,0 +1,50 @@
+import sqlite3
+from database import db_access
+
+db_path = "satellite_database.db"
+
+#Retention policy for TLE_Data
+#Element sets newer than keep_days are all kept, older history is thinned to the last epoch of each
+#day per satellite. The newest element set of every satellite always survives (it is the last of its day).
+
+keep_days = 30
+
+
+#Deletes thinned history and returns how many rows were removed
+def compact_tle_history(db_path=db_path, keep_days=keep_days, vacuum=False):
+
+    try:
+        conn = db_access.get_connection(db_path)
+
+        with conn:
+            c = conn.cursor()
+
+            #epoch_date is stored as '%Y-%m-%dT%H:%M:%SZ' so the cutoff uses the same format
+            c.execute("SELECT strftime('%Y-%m-%dT%H:%M:%SZ', 'now', ?)", (f"-{int(keep_days)} days",))
+            cutoff = c.fetchone()[0]
+
+            #the bare tle_id beside MAX() comes from the row holding the latest epoch of each day
+            c.execute("""DELETE FROM TLE_Data
+                      WHERE epoch_date < ?
+                      AND tle_id NOT IN (SELECT tle_id FROM
+                                         (SELECT tle_id, MAX(epoch_date) FROM TLE_Data
+                                          WHERE epoch_date < ?
+                                          GROUP BY norad_id, substr(epoch_date, 1, 10)))""", (cutoff, cutoff))
+            removed = c.rowcount
+
+        #Gives the freed pages back to the file system and refreshes the planner statistics
+        if vacuum and removed:
+            conn.execute("VACUUM")
+        conn.execute("PRAGMA optimize")
+
+        return removed
+
+    except sqlite3.Error as e:
+        print(f"Database error: {e}")
+        return 0
+
+
+#Run periodically, for example from cron: python -m database.tle_retention
+if __name__ == "__main__":
+    removed = compact_tle_history(vacuum=True)
+    print(f"Removed {removed} old TLE records")
@@ -0,0 +1,162 @@
+import time
+import numpy as np
+import tkinter as tk
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+from skyfield_calculations import sgp4_batch
+from propagator import frames
+from instrumentation import metrics
+from gui.task_runner import TaskRunner
+
+#Live map of many satellites at once
+#A short look-ahead SGP4 ephemeris is computed in the background and every frame only interpolates it,
+#rotates into the Earth fixed frame and blits the single marker artist over a cached background
+
+unix_epoch_jd = 2440587.5
+
+
+def now_jd():
+    return unix_epoch_jd + time.time() / 86400.0
+
+
+#Cubic Hermite interpolation of (N, T, 3) positions and velocities sampled every step seconds from start_jd
+#returns (N, 3) positions at Julian date jd, or None when jd is outside the window
+def interpolate_ephemeris(start_jd, step, rs, vs, jd):
+    t = (jd - start_jd) * 86400.0 / step
+    k = int(np.floor(t))
+    if k < 0 or k + 1 >= rs.shape[1]:
+        return None
+
+    s = t - k
+    h00 = 2*s**3 - 3*s**2 + 1
+    h10 = s**3 - 2*s**2 + s
+    h01 = -2*s**3 + 3*s**2
+    h11 = s**3 - s**2
+
+    return h00 * rs[:, k] + h10 * step * vs[:, k] + h01 * rs[:, k + 1] + h11 * step * vs[:, k + 1]
+
+
+#Runs on a worker thread
+def compute_ephemeris(task, satellites, start_jd, look_ahead, step):
+    task.progress(0.0, "Propagating")
+    errors, r, v = satellites.propagate(*sgp4_batch.jd_grid(start_jd, look_ahead, step))
+
+    #satellites SGP4 cannot propagate are hidden rather than drawn at a stale position
+    r[errors != 0] = np.nan
+    v[errors != 0] = np.nan
+    return start_jd, r, v
+
+
+class LiveTracker:
+
+    #records are (norad_id, satellite_name, tle_line1, tle_line2) tuples
+    def __init__(self, parent, records, fps=10, look_ahead=900.0, step=60.0):
+        self.satellites = sgp4_batch.SatelliteSet(records)
+        self.interval_ms = int(1000 / fps)
+        self.look_ahead = look_ahead
+        self.step = step
+
+        self.ephemeris = None
+        self.loading = None
+        self.frame_ms = 0.0
+        self.frame_id = None
+
+        self.window = tk.Toplevel(parent)
+        self.window.title(f"Live Tracking - {len(self.satellites)} satellites")
+        self.window.geometry('1280x720')
+        self.window.configure(bg='#333333')
+        self.window.protocol("WM_DELETE_WINDOW", self.stop)
+
+        #own runner so the main window's Cancel button never stops the ephemeris refills
+        self.task_runner = TaskRunner(self.window, max_workers=1)
+
+        #static background: drawn once and cached, redrawn only when the window is resized
+        self.fig = Figure(figsize=(12, 6))
+        self.ax = self.fig.add_subplot(111)
+        self.ax.set_xlim([-180, 180])
+        self.ax.set_ylim([-90, 90])
+        self.ax.set_xticks(range(-180, 181, 30))
+        self.ax.set_yticks(range(-90, 91, 30))
+        self.ax.grid(linewidth=0.25)
+        self.ax.set_xlabel('Longitude (deg)')
+        self.ax.set_ylabel('Latitude (deg)')
+
+        #every satellite is one point of a single animated artist
+        self.markers, = self.ax.plot([], [], 'o', color='c', markersize=3, animated=True)
+        self.readout = self.ax.text(0.01, 0.02, "", transform=self.ax.transAxes, color='w', fontsize=9, animated=True)
+
+        self.canvas = FigureCanvasTkAgg(self.fig, master=self.window)
+        self.canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
+        self.background = None
+        self.canvas.mpl_connect('draw_event', self.on_draw)
+        self.canvas.draw()
+
+        self.request_ephemeris(now_jd())
+        self.frame_id = self.window.after(self.interval_ms, self.frame)
+
+    #Full redraws (first show and resizes) refresh the cached background
+    def on_draw(self, event):
+        self.background = self.canvas.copy_from_bbox(self.ax.bbox)
+        self.draw_markers()
+
+    def request_ephemeris(self, start_jd):
+        if self.loading is not None or len(self.satellites) == 0:
+            return
+
+        self.loading = self.task_runner.submit(
+            "live ephemeris", compute_ephemeris, self.satellites, start_jd, self.look_ahead, self.step,
+            on_done=self.ephemeris_ready, on_error=self.ephemeris_failed, on_cancelled=self.ephemeris_cancelled)
+
+    def ephemeris_ready(self, ephemeris):
+        self.ephemeris = ephemeris
+        self.loading = None
+
+    def ephemeris_failed(self, e):
+        print(f"Live tracking ephemeris failed: {e}")
+        self.loading = None
+
+    #the next frame asks for a new window
+    def ephemeris_cancelled(self):
+        self.loading = None
+
+    @metrics.timed("render_seconds", "Time spent building and updating plots", {"view": "live"})
+    def frame(self):
+        start = time.perf_counter()
+        jd = now_jd()
+
+        #the next window is requested well before this one runs out
+        if self.ephemeris is None or jd > self.ephemeris[0] + (self.look_ahead - 3 * self.step) / 86400.0:
+            self.request_ephemeris(jd)
+
+        rs = None
+        if self.ephemeris is not None:
+            rs = interpolate_ephemeris(self.ephemeris[0], self.step, self.ephemeris[1], self.ephemeris[2], jd)
+
+        if rs is not None:
+            lat, lon, alt = frames.ecef2geodetic(frames.eci2ecef(rs, table=frames.gmst_table([0.0], jd)))
+            self.markers.set_data(lon, lat)
+
+        self.draw_markers()
+
+        #smoothed time spent per frame
+        self.frame_ms = 0.9 * self.frame_ms + 0.1 * (time.perf_counter() - start) * 1000.0
+        self.readout.set_text(f"{len(self.satellites)} satellites   frame {self.frame_ms:.2f} ms   {1000 / self.interval_ms:.0f} fps")
+
+        self.frame_id = self.window.after(self.interval_ms, self.frame)
+
+    #Blits only the moving artists over the cached background
+    def draw_markers(self):
+        if self.background is None:
+            return
+
+        self.canvas.restore_region(self.background)
+        self.ax.draw_artist(self.markers)
+        self.ax.draw_artist(self.readout)
+        self.canvas.blit(self.ax.bbox)
+
+    def stop(self):
+        if self.frame_id is not None:
+            self.window.after_cancel(self.frame_id)
+            self.frame_id = None
+        self.task_runner.shutdown()
+        self.window.destroy()
@@ -1,19 +1,29 @@
+import functools
 import tkinter as tk
 import sqlite3
 from tkinter import messagebox
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 import numpy as np
-from skyfield.api import EarthSatellite, load
-from skyfield_calculations import tle_fetcher
-from skyfield_calculations import orbital_calculations
-from propagator.orbit_propagator import OrbitPropagator
+from sgp4.api import jday
+from skyfield_calculations import timescale
+from database import db_access
+from propagator.trajectory_cache import TrajectoryCache
 from propagator import planetary_data
+from gui.task_runner import TaskRunner
+from instrumentation import metrics
 
+#matplotlib, skyfield and the TLE fetching and rendering modules take most of a second to import,
+#so they are imported inside the methods that first need them and the main window appears without them
 
-plt.style.use('dark_background')
 db_path = "satellite_database.db"
 
+
+#Imports pyplot and applies the GUI's plot style, once, before the first figure is made
+@functools.lru_cache(maxsize=None)
+def use_plot_style():
+    import matplotlib.pyplot as plt
+    plt.style.use('dark_background')
+
+
 class MainSystemGUI:
 
     def __init__(self, username):
@@ -26,7 +36,10 @@ class MainSystemGUI:
         self.window.title("Satellite Trajectory Tracker")
         self.window.geometry('1920x1080')
         self.window.configure(bg='#333333')
-        self.ts = load.timescale()
+
+        #Orbit visualisation window, created on the first tracked satellite and reused afterwards
+        self.visualisation_window = None
+        self.canvas = None
 
         #Header
         header_frame = tk.Frame(self.window, bg='#1373CC', height=80)
@@ -77,8 +90,34 @@ class MainSystemGUI:
             input_frame, text="Exit Program",command=self.exit_program, bg="#1373CC",fg="#FFFFFF",font=("Arial", 14),width=15,height=2
             )
         
+        #Button to cancel every satellite that is still loading
+        cancel_button = tk.Button(
+            input_frame, text="Cancel",command=self.cancel_tracking, bg="#1373CC",fg="#FFFFFF",font=("Arial", 14),width=15,height=2
+            )
+
+        #Button to show the current position of every favourite satellite
+        live_button = tk.Button(
+            input_frame, text="Live Tracking",command=self.live_tracking, bg="#1373CC",fg="#FFFFFF",font=("Arial", 14),width=15,height=2
+            )
+
         track_button.grid(row=0, column=2, padx=10, pady=10)
-        exit_button.grid(row=0, column=3, padx=10, pady=10)
+        cancel_button.grid(row=0, column=3, padx=10, pady=10)
+        live_button.grid(row=0, column=4, padx=10, pady=10)
+        exit_button.grid(row=0, column=5, padx=10, pady=10)
+
+        #Progress of the satellites currently being loaded
+        self.status_label = tk.Label(
+            input_frame, text="", bg='#333333', fg="#FFFFFF", font=("Arial", 12), justify=tk.LEFT
+            )
+        self.status_label.grid(row=1, column=0, columnspan=6, pady=5)
+        self.task_status = {}
+
+        #Fetching, database writes and propagation run on worker threads so the window stays responsive
+        self.task_runner = TaskRunner(self.window)
+        self.live_tracker = None
+
+        #created with the window rather than at import, as it makes its directory in the working directory
+        self.trajectory_cache = TrajectoryCache()
 
         #Added example NORAD ID's for user to experiment with
         info_frame = tk.Frame(self.window, bg='#333333')
@@ -110,17 +149,31 @@ class MainSystemGUI:
             return
         
 
-        #Fetch TLE data
-        satellite_data = tle_fetcher.fetch_satellite_tle(norad_id)
+        #Several satellites can load at once, each on its own worker
+        self.task_runner.submit(
+            f"NORAD ID {norad_id}", self.load_satellite, norad_id,
+            on_done=self.show_satellite,
+            on_error=lambda e, norad_id=norad_id: self.satellite_failed(norad_id, f"An error occurred: {e}"),
+            on_progress=lambda fraction, message, norad_id=norad_id: self.update_status(norad_id, fraction, message)
+            )
+
+    #Runs on a worker thread: nothing in here may touch Tk
+    def load_satellite(self, task, norad_id):
+        from skyfield.api import EarthSatellite
+        from skyfield_calculations import tle_cache, orbital_calculations
+
+        #Fetch TLE data (served from the database while the stored TLE is still fresh)
+        task.progress(0.0, "Fetching TLE")
+        satellite_data = tle_cache.fetch_satellite_tle(norad_id)
 
         if not satellite_data:
-            messagebox.showerror("Error", f"Could not fetch data for NORAD ID: {norad_id}")
-            return
+            return {"norad_id": norad_id, "error": f"Could not fetch data for NORAD ID: {norad_id}"}
 
         norad_id, satellite_name, tle_line1, tle_line2 = satellite_data
 
         #Create satellite object
-        satellite = EarthSatellite(tle_line1, tle_line2, satellite_name, self.ts)
+        task.progress(0.3, "Classifying orbit")
+        satellite = EarthSatellite(tle_line1, tle_line2, satellite_name, timescale.get_timescale())
         orbit_type, altitude, inclination = orbital_calculations.classify_orbit(satellite)
 
         eccentricity = satellite.model.ecco
@@ -128,8 +181,30 @@ class MainSystemGUI:
         epoch_date = satellite.epoch.utc_iso()
 
         #Save the information to my database
+        task.progress(0.4, "Saving")
+        self.store_satellite(norad_id, satellite_name, tle_line1, tle_line2, orbit_type, inclination, eccentricity, mean_motion, epoch_date)
+
+        favourite = self.add_to_user_favourites(norad_id)
+
+        task.progress(0.6, "Propagating orbit")
+        rs = self.propagate_track(satellite_name, altitude, tle_line1, tle_line2)
+        task.check_cancelled()
+
+        return {
+            "norad_id": norad_id,
+            "satellite_name": satellite_name,
+            "orbit_type": orbit_type,
+            "altitude": altitude,
+            "inclination": inclination,
+            "favourite": favourite,
+            "rs": rs
+        }
+
+    #Saves the satellite and its classified element set, runs on a worker thread
+    @metrics.timed("db_write_seconds", "Database write time", {"operation": "store_satellite"})
+    def store_satellite(self, norad_id, satellite_name, tle_line1, tle_line2, orbit_type, inclination, eccentricity, mean_motion, epoch_date):
         try:
-            with sqlite3.connect(db_path) as conn:
+            with db_access.get_connection(db_path) as conn:
                 c = conn.cursor()
 
                 c.execute("""INSERT OR IGNORE INTO Satellites
@@ -138,9 +213,11 @@ class MainSystemGUI:
                           (norad_id, satellite_name))
                 
 
+                #The TLE cache has usually stored this element set already, so only the classification is added
                 c.execute("""INSERT INTO TLE_Data
                           (norad_id, tle_line1, tle_line2, orbit_type, inclination, eccentricity, mean_motion, epoch_date)
-                          VALUES (?, ?, ?, ?, ?, ?, ?, ?)""",
+                          VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                          ON CONFLICT(norad_id, epoch_date) DO UPDATE SET orbit_type = excluded.orbit_type""",
                           (norad_id, tle_line1, tle_line2, orbit_type, inclination, eccentricity, mean_motion, epoch_date))
 
                 conn.commit()
@@ -148,81 +225,107 @@ class MainSystemGUI:
         except sqlite3.Error as e:
             print(f"Database error: {e}")
 
+    #Runs on the main thread once load_satellite has finished
+    def show_satellite(self, result):
 
-        self.add_to_user_favourites(norad_id)
-                   
+        if "error" in result:
+            self.satellite_failed(result["norad_id"], result["error"])
+            return
+
+        self.update_status(result["norad_id"], None, "")
+
+        title, message = result["favourite"]
+        if title == "Success":
+            messagebox.showinfo(title, message)
+        else:
+            messagebox.showerror(title, message)
 
         #Orbit parameters for satellite
-        info_message = f"Satellite: {satellite_name}\n"
-        info_message += f"NORAD ID: {norad_id}\n"
-        info_message += f"Orbit Type: {orbit_type}\n"
-        info_message += f"Altitude: {altitude:.2f} km\n"
-        info_message += f"Inclination: {inclination:.2f}°\n\n"
+        info_message = f"Satellite: {result['satellite_name']}\n"
+        info_message += f"NORAD ID: {result['norad_id']}\n"
+        info_message += f"Orbit Type: {result['orbit_type']}\n"
+        info_message += f"Altitude: {result['altitude']:.2f} km\n"
+        info_message += f"Inclination: {result['inclination']:.2f}°\n\n"
 
         messagebox.showinfo("Satellite Info", info_message)
 
         #Visualize orbit
-        self.visualize_orbit(satellite_name, altitude, inclination)
+        self.visualize_orbit(result["satellite_name"], result["rs"])
 
+    def satellite_failed(self, norad_id, message):
+        self.update_status(norad_id, None, "")
+        messagebox.showerror("Error", message)
 
-    def visualize_orbit(self, satellite_name, altitude, inclination):
-        cb = planetary_data.earth
+    #fraction is None once a satellite is finished, which removes its line
+    def update_status(self, norad_id, fraction, message):
+        if fraction is None:
+            self.task_status.pop(norad_id, None)
+        else:
+            self.task_status[norad_id] = f"NORAD ID {norad_id}: {message} ({fraction:.0%})"
+
+        self.status_label.config(text="\n".join(self.task_status.values()))
 
-        #Classical orbital elements (COES): [a, e, i, ta, aop, raan]
-        coes = [cb["radius"] + altitude, 0.0001, inclination, 0.0, 0.0, 0.0]
+    def cancel_tracking(self):
+        self.task_runner.cancel_all()
+
+    #Runs on a worker thread, returns the (T, 3) positions to plot
+    def propagate_track(self, satellite_name, altitude, tle_line1, tle_line2):
+        from skyfield_calculations import sgp4_batch
+        cb = planetary_data.earth
 
         a = cb["radius"] + altitude
         period = 2 * np.pi * np.sqrt(a**3 / cb["mu"]) / 60  # orbital period in minutes
         tspan = max(period * 1.2, 100) * 60.0  # at least 1.2 full orbits, in seconds
         dt = 10.0 #Found that a smaller timespan = higher accuracy
 
-        op = OrbitPropagator(coes, tspan, dt, coes=True)
-        op.propagate_orbit()
-
-        #Visualization window
-        visualisaton_window = tk.Toplevel(self.window)
-        visualisaton_window.title(f"Orbit Visualization - {satellite_name}")
-        visualisaton_window.geometry('1280x720')
-        visualisaton_window.configure(bg='#333333')
-
-        #Create matplotlib plot
-        fig = plt.figure(figsize=(10, 8))
-        ax = fig.add_subplot(111, projection='3d')
-
-        #Plot trajectory
-        ax.plot(op.rs[:, 0], op.rs[:, 1], op.rs[:, 2], 'c-', linewidth=1.5, label=satellite_name)
-        ax.plot([op.rs[0, 0]], [op.rs[0, 1]], [op.rs[0, 2]], 'go', markersize=8, label='Inital Satellite Position')
-
-        #Plot Earth
-        u = np.linspace(0, 2 * np.pi, 50)
-        v = np.linspace(0, np.pi, 50)
-        x = cb["radius"] * np.outer(np.cos(u), np.sin(v))
-        y = cb["radius"] * np.outer(np.sin(u), np.sin(v))
-        z = cb["radius"] * np.outer(np.ones(np.size(u)), np.cos(v))
-        ax.plot_wireframe(x, y, z, color="k", linewidth=0.3, alpha=0.3)
-
-        #Set labels and limits
-        max_val = np.max(np.abs(op.rs)) * 1.1
-        ax.set_xlim([-max_val, max_val])
-        ax.set_ylim([-max_val, max_val])
-        ax.set_zlim([-max_val, max_val])
-
-        ax.set_xlabel('X (km)', fontsize=10)
-        ax.set_ylabel('Y (km)', fontsize=10)
-        ax.set_zlabel('Z (km)', fontsize=10)
+        #SGP4 from the real TLE, starting at the current minute so repeat views reuse the cached ephemeris
+        year, month, day, hour, minute, second = timescale.get_timescale().now().utc
+        start_jd = sum(jday(year, month, day, hour, minute, 0))
+        satellites = sgp4_batch.SatelliteSet([(0, satellite_name, tle_line1, tle_line2)])
+
+        def propagate():
+            errors, r, v = satellites.propagate(*sgp4_batch.jd_grid(start_jd, tspan, dt))
+            for norad_id, message in sgp4_batch.describe_errors(satellites.norad_ids, errors).items():
+                print(f"SGP4 error for {satellite_name}: {message}")
+            return np.concatenate((r[0], v[0]), axis=1)
+
+        key = self.trajectory_cache.make_key([tle_line1, tle_line2], tspan, dt, 'sgp4', integrator_options={"start_jd": start_jd})
+        return self.trajectory_cache.get_or_propagate(key, propagate)[:, :3]
+
+    @metrics.timed("render_seconds", "Time spent building and updating plots", {"view": "visualisation"})
+    def visualize_orbit(self, satellite_name, rs):
+        from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+        from gui import orbit_renderer
+        use_plot_style()
+
+        #One visualisation window and canvas is reused for every tracked satellite
+        fig, ax = orbit_renderer.renderer.draw(
+            "visualisation",
+            [(rs, satellite_name, {"color": "c", "linewidth": 1.5},
+              {"color": "g", "marker": "o", "markersize": 8, "label": "Inital Satellite Position"})],
+            embedded=True, figsize=(10, 8), earth_style={"color": "k", "linewidth": 0.3, "alpha": 0.3}, margin=1.1)
 
         ax.set_title(f'{satellite_name} Orbital Trajectory', fontsize=14, fontweight='bold')
         ax.legend(loc='upper right')
 
-        #Embed matplotlib in tkinter
-        canvas = FigureCanvasTkAgg(fig, master=visualisaton_window)
-        canvas.draw()
-        canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
+        if self.visualisation_window is None or not self.visualisation_window.winfo_exists():
+            self.visualisation_window = tk.Toplevel(self.window)
+            self.visualisation_window.geometry('1280x720')
+            self.visualisation_window.configure(bg='#333333')
+
+            #Embed matplotlib in tkinter
+            self.canvas = FigureCanvasTkAgg(fig, master=self.visualisation_window)
+            self.canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
+
+        self.visualisation_window.title(f"Orbit Visualization - {satellite_name}")
+        self.canvas.draw_idle()
 
     #The system presumes that when a user enters a satellite, it automatically goes into their favourites
+    #returns a (title, message) pair for show_satellite as this runs on a worker thread
+    @metrics.timed("db_write_seconds", "Database write time", {"operation": "add_to_user_favourites"})
     def add_to_user_favourites(self, norad_id):
         try:
-            with sqlite3.connect(db_path) as conn:
+            with db_access.get_connection(db_path) as conn:
                 c = conn.cursor()
 
                 c.execute("SELECT user_id from Users WHERE username = ?", (self.username,))
@@ -235,18 +338,18 @@ class MainSystemGUI:
                             (user_id, norad_id))
                     
                     conn.commit()
-                    messagebox.showinfo("Success", "Satellite added to user favourites")
+                    return "Success", "Satellite added to user favourites"
                 else:
-                    messagebox.showerror("User not found")
+                    return "Error", "User not found"
 
         except sqlite3.Error as e:
-            messagebox.showerror("Could not add to favourites")
+            return "Error", "Could not add to favourites"
 
     #This function joins the satellites table with the user favourites tables
 
     def get_user_favourites(self):
         try:
-            with sqlite3.connect(db_path) as conn:
+            with db_access.get_connection(db_path) as conn:
                 c = conn.cursor()
 
                 c.execute("""SELECT Satellites.norad_id, Satellites.satellite_name
@@ -261,6 +364,40 @@ class MainSystemGUI:
             print("Error fetching favourites")
             return [0]
         
+    #Newest stored element set of each of the user's favourites, as (norad_id, satellite_name, tle_line1, tle_line2)
+    def get_favourite_tles(self):
+        try:
+            with db_access.get_connection(db_path) as conn:
+                c = conn.cursor()
+
+                c.execute("""SELECT Latest_TLE.norad_id, Satellites.satellite_name, Latest_TLE.tle_line1, Latest_TLE.tle_line2
+                          FROM User_Favourites
+                          JOIN Users ON User_Favourites.user_id = Users.user_id
+                          JOIN Latest_TLE ON User_Favourites.norad_id = Latest_TLE.norad_id
+                          JOIN Satellites ON User_Favourites.norad_id = Satellites.norad_id
+                          WHERE Users.username = ?""", (self.username,))
+
+                return c.fetchall()
+
+        except sqlite3.Error as e:
+            print(f"Error fetching favourite TLEs: {e}")
+            return []
+
+    #Opens the live map of the user's favourites, or brings the open one to the front
+    def live_tracking(self):
+        if self.live_tracker is not None and self.live_tracker.window.winfo_exists():
+            self.live_tracker.window.lift()
+            return
+
+        records = self.get_favourite_tles()
+        if not records:
+            messagebox.showinfo("Live Tracking", "Track a satellite first to add it to your favourites")
+            return
+
+        from gui.live_tracker import LiveTracker
+        use_plot_style()
+        self.live_tracker = LiveTracker(self.window, records)
+
     def format_favourites_display(self):
 
         #Retrieve the user's saved favourite satellites
@@ -278,6 +415,7 @@ class MainSystemGUI:
 
     #Closes main application window
     def exit_program(self):
+        self.task_runner.shutdown()
         self.window.destroy()
         print("Program closed successfully")
 
@@ -0,0 +1,148 @@
+import functools
+import numpy as np
+import matplotlib.pyplot as plt
+from matplotlib.figure import Figure
+from propagator import planetary_data
+
+#Shared rendering layer for the orbit plots
+#The Earth wireframe is built once per radius, trajectories are thinned to a point budget before they reach
+#matplotlib and every named scene keeps one figure whose line artists are updated in place,
+#so tracking satellite after satellite does not create new figures or re-add the Earth
+
+
+#Earth wireframe coordinates, built once per radius and resolution
+@functools.lru_cache(maxsize=8)
+def earth_mesh(radius, resolution=50):
+    u = np.linspace(0, 2 * np.pi, resolution)
+    v = np.linspace(0, np.pi, resolution)
+    x = radius * np.outer(np.cos(u), np.sin(v))
+    y = radius * np.outer(np.sin(u), np.sin(v))
+    z = radius * np.outer(np.ones(np.size(u)), np.cos(v))
+
+    for array in (x, y, z):
+        array.flags.writeable = False
+    return x, y, z
+
+
+#Curvature aware downsampling of a (T, 3) trajectory to at most budget points
+#Half of the budget is spread by arc length and half by turning angle, so tight bends (perigee of an
+#eccentric orbit) keep their shape while long smooth arcs are thinned. The end points are always kept.
+def decimate(rs, budget=2000):
+
+    rs = np.asarray(rs)
+    n = rs.shape[0]
+    if n <= budget:
+        return rs
+
+    segments = np.diff(rs, axis=0)
+    lengths = np.sqrt(np.einsum('ij,ij->i', segments, segments))
+    lengths = np.nan_to_num(lengths)
+
+    #turning angle at every interior point
+    cos_turn = np.einsum('ij,ij->i', segments[:-1], segments[1:]) / np.maximum(lengths[:-1] * lengths[1:], 1e-12)
+    turn = np.nan_to_num(np.arccos(np.clip(cos_turn, -1.0, 1.0)))
+
+    importance = np.zeros(n)
+    importance[1:] += 0.5 * lengths / max(lengths.sum(), 1e-12)
+    importance[1:-1] += 0.5 * turn / max(turn.sum(), 1e-12)
+
+    cumulative = np.cumsum(importance)
+    keep = np.searchsorted(cumulative, np.linspace(0.0, cumulative[-1], budget))
+    keep = np.unique(np.concatenate(([0], np.minimum(keep, n - 1), [n - 1])))
+
+    return rs[keep]
+
+
+class OrbitRenderer:
+
+    def __init__(self, cb=planetary_data.earth, point_budget=2000):
+        self.cb = cb
+        self.point_budget = point_budget
+
+        #scene name -> {"figure", "ax", "lines"}
+        self.scenes = {}
+
+    #Figure and 3D axes for a named view, created once and reused afterwards
+    #embedded scenes use a plain Figure (for FigureCanvasTkAgg) so pyplot never holds on to them
+    #cb is the body drawn at the centre (the renderer's own by default)
+    def scene(self, name, embedded=False, figsize=(10, 8), earth_style=None, cb=None):
+
+        scene = self.scenes.get(name)
+        if scene is not None:
+            if scene["embedded"]:
+                return scene["figure"], scene["ax"]
+
+            #a pyplot window closed by the user is rebuilt, otherwise it becomes the current figure again
+            if plt.fignum_exists(name):
+                plt.figure(num=name)
+                return scene["figure"], scene["ax"]
+
+        if embedded:
+            fig = Figure(figsize=figsize)
+        else:
+            fig = plt.figure(num=name, figsize=figsize)
+            fig.clf()
+
+        ax = fig.add_subplot(111, projection='3d')
+
+        x, y, z = earth_mesh((cb or self.cb)["radius"])
+        ax.plot_wireframe(x, y, z, **(earth_style or {"color": "k", "linewidth": 0.25}))
+
+        ax.set_xlabel('X (km)')
+        ax.set_ylabel('Y (km)')
+        ax.set_zlabel('Z (km)')
+
+        self.scenes[name] = {"figure": fig, "ax": ax, "lines": {}, "embedded": embedded}
+        return fig, ax
+
+    #Draws trajectories into a scene, reusing the line artists of labels that are already shown
+    #trajectories is a list of (rs, label, line_style, start_style) with rs shaped (T, 3)
+    def draw(self, name, trajectories, title=None, embedded=False, figsize=(10, 8), earth_style=None, margin=1.0, cb=None):
+
+        fig, ax = self.scene(name, embedded, figsize, earth_style, cb)
+        lines = self.scenes[name]["lines"]
+
+        shown = set()
+        max_val = (cb or self.cb)["radius"]
+
+        for rs, label, line_style, start_style in trajectories:
+            points = decimate(rs, self.point_budget)
+            shown.add(label)
+
+            if label in lines:
+                path, start = lines[label]
+                path.set_data_3d(points[:, 0], points[:, 1], points[:, 2])
+                start.set_data_3d([points[0, 0]], [points[0, 1]], [points[0, 2]])
+            else:
+                path, = ax.plot(points[:, 0], points[:, 1], points[:, 2], label=label, **line_style)
+                start, = ax.plot([points[0, 0]], [points[0, 1]], [points[0, 2]], **start_style)
+                lines[label] = (path, start)
+
+            max_val = max(max_val, np.nanmax(np.abs(points)))
+
+        #trajectories from the previous view that are not part of this one
+        for label in list(lines):
+            if label not in shown:
+                for artist in lines.pop(label):
+                    artist.remove()
+
+        max_val *= margin
+        ax.set_xlim([-max_val, max_val])
+        ax.set_ylim([-max_val, max_val])
+        ax.set_zlim([-max_val, max_val])
+
+        if title is not None:
+            ax.set_title(title)
+        ax.legend()
+
+        return fig, ax
+
+    #Drops a scene and releases its figure
+    def close(self, name):
+        scene = self.scenes.pop(name, None)
+        if scene is not None and not scene["embedded"] and plt.fignum_exists(name):
+            plt.close(scene["figure"])
+
+
+#Shared renderer used by the GUI and the plotting helpers
+renderer = OrbitRenderer()
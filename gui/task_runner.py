@@ -0,0 +1,117 @@
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+#Runs slow work (network fetches, database writes, propagation) on a thread pool so the Tk main loop never blocks
+#Workers never touch Tk: progress and results go through a queue which the main loop drains with after(),
+#so every callback runs on the main thread
+
+
+class TaskCancelled(Exception):
+    pass
+
+
+class Task:
+
+    def __init__(self, runner, name, on_done, on_error, on_progress, on_cancelled):
+        self.runner = runner
+        self.name = name
+        self.on_done = on_done
+        self.on_error = on_error
+        self.on_progress = on_progress
+        self.on_cancelled = on_cancelled
+        self.future = None
+        self.cancelled = threading.Event()
+
+    #Called from the worker, fraction in [0, 1]
+    def progress(self, fraction, message=""):
+        self.check_cancelled()
+        self.runner.messages.put(("progress", self, (fraction, message)))
+
+    #Workers call this between steps, a cancelled task stops at its next check
+    def check_cancelled(self):
+        if self.cancelled.is_set():
+            raise TaskCancelled(self.name)
+
+    def cancel(self):
+        self.cancelled.set()
+
+        #a task that never started will not report back by itself
+        if self.future is not None and self.future.cancel():
+            self.runner.messages.put(("cancelled", self, None))
+
+
+class TaskRunner:
+
+    def __init__(self, root, max_workers=4, poll_ms=50):
+        self.root = root
+        self.poll_ms = poll_ms
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="task")
+        self.messages = queue.Queue()
+        self.tasks = set()
+        self.poll_id = self.root.after(self.poll_ms, self.poll)
+
+    #Runs fn(task, *args, **kwargs) on a worker thread, on_done(result) / on_error(exception) /
+    #on_progress(fraction, message) / on_cancelled() are called on the main thread
+    def submit(self, name, fn, *args, on_done=None, on_error=None, on_progress=None, on_cancelled=None, **kwargs):
+        task = Task(self, name, on_done, on_error, on_progress, on_cancelled)
+        self.tasks.add(task)
+        task.future = self.executor.submit(self.run_task, task, fn, args, kwargs)
+        return task
+
+    def run_task(self, task, fn, args, kwargs):
+        try:
+            task.check_cancelled()
+            result = fn(task, *args, **kwargs)
+            self.messages.put(("done", task, result))
+
+        except TaskCancelled:
+            self.messages.put(("cancelled", task, None))
+
+        except Exception as e:
+            self.messages.put(("error", task, e))
+
+    #Delivers queued messages on the main thread and schedules the next poll
+    def poll(self):
+        while True:
+            try:
+                kind, task, value = self.messages.get_nowait()
+            except queue.Empty:
+                break
+
+            if kind != "progress":
+                self.tasks.discard(task)
+
+            #results of a task cancelled after its last check are dropped and reported as a cancellation,
+            #so the caller still hears back once
+            if task.cancelled.is_set() and kind != "cancelled":
+                if kind == "progress":
+                    continue
+                kind = "cancelled"
+
+            if kind == "progress" and task.on_progress:
+                task.on_progress(*value)
+            elif kind == "done" and task.on_done:
+                task.on_done(value)
+            elif kind == "error":
+                if task.on_error:
+                    task.on_error(value)
+                else:
+                    print(f"Task {task.name} failed: {value}")
+            elif kind == "cancelled":
+                if task.on_progress:
+                    task.on_progress(None, "Cancelled")
+                if task.on_cancelled:
+                    task.on_cancelled()
+
+        self.poll_id = self.root.after(self.poll_ms, self.poll)
+
+    def cancel_all(self):
+        for task in list(self.tasks):
+            task.cancel()
+
+    #Stops polling and abandons queued work, running tasks finish in the background
+    def shutdown(self):
+        self.cancel_all()
+        self.root.after_cancel(self.poll_id)
+        self.executor.shutdown(wait=False, cancel_futures=True)
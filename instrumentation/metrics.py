@@ -0,0 +1,295 @@
+import atexit
+import bisect
+import cProfile
+import functools
+import io
+import json
+import os
+import pstats
+import threading
+import time
+import tracemalloc
+
+#Opt-in instrumentation for the propagation pipeline
+#Counters and histograms live in one in-process registry which can be dumped as JSON or Prometheus text.
+#While disabled every hook costs a single module attribute check, so the hooks stay in production code:
+#  metrics.enable() / metrics.disable()     switch recording on and off at runtime
+#  TRACKER_METRICS=metrics.json             enable at start up and write the registry there at exit
+#                                           (.prom or .txt files get Prometheus text instead of JSON)
+#  TRACKER_PROFILE=profile.prof             cProfile and tracemalloc capture from start up, written at exit
+
+enabled = False
+
+#Upper bounds in seconds, from sub-millisecond database writes to multi second propagations
+default_buckets = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 60.0)
+
+
+def enable():
+    global enabled
+    enabled = True
+
+
+def disable():
+    global enabled
+    enabled = False
+
+
+class Counter:
+
+    kind = "counter"
+
+    def __init__(self, name, help, labels):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.lock = threading.Lock()
+        self.value = 0
+
+    def inc(self, amount=1):
+        with self.lock:
+            self.value += amount
+
+    def reset(self):
+        with self.lock:
+            self.value = 0
+
+    def sample(self):
+        return {"labels": self.labels, "value": self.value}
+
+    def prometheus_lines(self):
+        return [f"{self.name}{format_labels(self.labels)} {self.value}"]
+
+
+class Histogram:
+
+    kind = "histogram"
+
+    def __init__(self, name, help, labels, buckets=default_buckets):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.buckets = tuple(sorted(buckets))
+        self.lock = threading.Lock()
+        self.reset()
+
+    def observe(self, value):
+        #observations above the last bound only go into the implicit +Inf bucket
+        index = bisect.bisect_left(self.buckets, value)
+        with self.lock:
+            self.counts[index] += 1
+            self.sum += value
+            self.count += 1
+
+    def reset(self):
+        with self.lock:
+            self.counts = [0] * (len(self.buckets) + 1)
+            self.sum = 0.0
+            self.count = 0
+
+    def sample(self):
+        return {"labels": self.labels, "count": self.count, "sum": self.sum,
+                "buckets": dict(zip([str(bound) for bound in self.buckets] + ["+Inf"], self.counts))}
+
+    #Prometheus buckets are cumulative
+    def prometheus_lines(self):
+        lines = []
+        cumulative = 0
+        for bound, count in zip(list(self.buckets) + ["+Inf"], self.counts):
+            cumulative += count
+            lines.append(f"{self.name}_bucket{format_labels(dict(self.labels, le=str(bound)))} {cumulative}")
+        lines.append(f"{self.name}_sum{format_labels(self.labels)} {self.sum}")
+        lines.append(f"{self.name}_count{format_labels(self.labels)} {self.count}")
+        return lines
+
+
+def format_labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{value}"' for key, value in sorted(labels.items())) + "}"
+
+
+class Registry:
+
+    def __init__(self):
+        self.lock = threading.Lock()
+
+        #(name, sorted label items) -> metric, one entry per label combination
+        self.metrics = {}
+
+    #Returns the metric with this name and labels, creating it on first use
+    def get(self, cls, name, help="", labels=None, **options):
+        labels = dict(labels or {})
+        key = (name, tuple(sorted(labels.items())))
+
+        with self.lock:
+            metric = self.metrics.get(key)
+            if metric is None:
+                metric = self.metrics[key] = cls(name, help, labels, **options)
+            elif not isinstance(metric, cls):
+                raise ValueError(f"{name} is already registered as a {metric.kind}")
+
+        return metric
+
+    def counter(self, name, help="", labels=None):
+        return self.get(Counter, name, help, labels)
+
+    def histogram(self, name, help="", labels=None, buckets=default_buckets):
+        return self.get(Histogram, name, help, labels, buckets=buckets)
+
+    def reset(self):
+        for metric in list(self.metrics.values()):
+            metric.reset()
+
+    #Metrics grouped by name, in registration order
+    def families(self):
+        families = {}
+        for metric in list(self.metrics.values()):
+            families.setdefault(metric.name, []).append(metric)
+        return families
+
+    def to_dict(self):
+        return {name: {"type": metrics[0].kind, "help": metrics[0].help, "samples": [metric.sample() for metric in metrics]}
+                for name, metrics in self.families().items()}
+
+    def to_json(self, indent=2):
+        return json.dumps(self.to_dict(), indent=indent)
+
+    def to_prometheus(self):
+        lines = []
+        for name, metrics in self.families().items():
+            if metrics[0].help:
+                lines.append(f"# HELP {name} {metrics[0].help}")
+            lines.append(f"# TYPE {name} {metrics[0].kind}")
+            for metric in metrics:
+                lines += metric.prometheus_lines()
+        return "\n".join(lines) + "\n"
+
+    #Writes Prometheus text for .prom / .txt paths and JSON otherwise
+    def dump(self, path):
+        text = self.to_prometheus() if path.endswith((".prom", ".txt")) else self.to_json()
+        with open(path, "w") as f:
+            f.write(text)
+
+
+#Shared registry used by every hook
+registry = Registry()
+
+
+#Records how long each call takes in a histogram, the wrapped function runs untouched while disabled
+def timed(name, help="", labels=None, buckets=default_buckets):
+    histogram = registry.histogram(name, help, labels, buckets)
+
+    def decorate(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not enabled:
+                return fn(*args, **kwargs)
+
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                histogram.observe(time.perf_counter() - start)
+
+        return wrapper
+
+    return decorate
+
+
+#cProfile and tracemalloc capture, started and stopped at runtime
+#cProfile only sees the thread that called start (for the GUI, the Tk thread), tracemalloc sees every thread
+class Capture:
+
+    def __init__(self):
+        self.profiler = None
+        self.memory = False
+        self.stats = None
+        self.snapshot = None
+
+    @property
+    def running(self):
+        return self.profiler is not None or self.memory
+
+    def start(self, cpu=True, memory=False):
+        if self.running:
+            self.stop()
+
+        if cpu:
+            self.profiler = cProfile.Profile()
+            self.profiler.enable()
+
+        if memory and not tracemalloc.is_tracing():
+            tracemalloc.start(10)
+            self.memory = True
+
+    def stop(self):
+        if self.profiler is not None:
+            self.profiler.disable()
+            self.stats = pstats.Stats(self.profiler)
+            self.profiler = None
+
+        if self.memory:
+            self.snapshot = tracemalloc.take_snapshot()
+            tracemalloc.stop()
+            self.memory = False
+
+    #Top functions of the last CPU capture
+    def cpu_report(self, sort="cumulative", limit=25):
+        if self.stats is None:
+            return "No CPU profile captured"
+
+        stream = io.StringIO()
+        self.stats.stream = stream
+        self.stats.sort_stats(sort).print_stats(limit)
+        return stream.getvalue()
+
+    #Source lines holding the most memory allocated during the last capture
+    def memory_report(self, limit=25):
+        if self.snapshot is None:
+            return "No memory snapshot captured"
+
+        stats = self.snapshot.statistics("lineno")
+        lines = [f"Top {min(limit, len(stats))} of {len(stats)} allocation sites, "
+                 f"{sum(stat.size for stat in stats) / 1024**2:.1f} MiB in total"]
+        lines += [str(stat) for stat in stats[:limit]]
+        return "\n".join(lines)
+
+    #Writes the CPU profile (readable with pstats or snakeviz) and a text memory report next to it
+    def dump(self, path):
+        if self.stats is not None:
+            self.stats.dump_stats(path)
+        if self.snapshot is not None:
+            with open(path + ".memory.txt", "w") as f:
+                f.write(self.memory_report())
+
+
+capture = Capture()
+
+
+def start_capture(cpu=True, memory=False):
+    capture.start(cpu, memory)
+
+
+def stop_capture():
+    capture.stop()
+    return capture
+
+
+#Start up toggles from the environment
+def _dump_at_exit(metrics_path, profile_path):
+    if metrics_path:
+        registry.dump(metrics_path)
+    if profile_path:
+        capture.stop()
+        capture.dump(profile_path)
+
+
+_metrics_path = os.environ.get("TRACKER_METRICS")
+_profile_path = os.environ.get("TRACKER_PROFILE")
+
+if _metrics_path:
+    enable()
+if _profile_path:
+    start_capture(cpu=True, memory=True)
+if _metrics_path or _profile_path:
+    atexit.register(_dump_at_exit, _metrics_path, _profile_path)
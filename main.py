@@ -1,5 +1,4 @@
 from auth.login_gui import LoginWindow
-from gui.main_system import MainSystemGUI
 
 if __name__ == "__main__":
     #Show login window first
@@ -8,6 +7,9 @@ if __name__ == "__main__":
 
     #If login successful, show main system
     if login_successful:
+        #Imported only after login, the login window does not wait for the plotting and orbit libraries
+        from gui.main_system import MainSystemGUI
+
         main_system = MainSystemGUI(username)
         main_system.run()
 
@@ -0,0 +1,191 @@
+import os
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from scipy.spatial import cKDTree
+from propagator import n_orbits, planetary_data
+
+#Conjunction screening: which objects come within threshold km of each other
+#Every sample interval [t0, t1] is screened with a KD-tree built on the positions at t0, so only pairs that are
+#already close enough to meet before t1 are examined instead of all N^2 pairs. Their time of closest approach
+#(TCA) is then refined on a cubic Hermite interpolant of the relative state.
+
+conjunction_dtype = np.dtype([
+    ("object_1", "i4"), #row index into the screened states
+    ("object_2", "i4"),
+    ("tca", "f8"), #seconds since the start of the screening
+    ("miss_distance", "f8"), #km
+    ("relative_speed", "f8") #km/s at TCA
+])
+
+newton_iterations = 4
+
+
+#Relative position and velocity of each pair on s in [0, 1] along the interval, with the
+#first and second derivatives of the relative position with respect to s
+def _hermite(s, dr0, dv0, dr1, dv1, dt):
+    s = s[:, None]
+    s2, s3 = s * s, s * s * s
+
+    p = (2*s3 - 3*s2 + 1) * dr0 + (s3 - 2*s2 + s) * dt * dv0 + (-2*s3 + 3*s2) * dr1 + (s3 - s2) * dt * dv1
+    dp = (6*s2 - 6*s) * dr0 + (3*s2 - 4*s + 1) * dt * dv0 + (-6*s2 + 6*s) * dr1 + (3*s2 - 2*s) * dt * dv1
+    ddp = (12*s - 6) * dr0 + (6*s - 4) * dt * dv0 + (-12*s + 6) * dr1 + (6*s - 2) * dt * dv1
+
+    return p, dp, ddp
+
+
+#Screens one sample interval, r0/v0 and r1/v1 are (N, 3) states at t0 and t0 + dt
+def screen_interval(t0, dt, r0, v0, r1, v1, threshold):
+
+    #A pair that comes within threshold inside the interval was at most threshold + |v_rel| * dt apart at t0
+    #(relative motion is close to a straight line over a short interval)
+    speeds = np.sqrt(np.maximum(np.einsum('ij,ij->i', v0, v0), np.einsum('ij,ij->i', v1, v1)))
+    radius = threshold + 2.0 * speeds.max() * dt
+
+    pairs = cKDTree(r0).query_pairs(radius, output_type='ndarray')
+    if len(pairs) == 0:
+        return np.zeros(0, dtype=conjunction_dtype)
+
+    i, j = pairs[:, 0], pairs[:, 1]
+    dr0, dv0 = r0[j] - r0[i], v0[j] - v0[i]
+    dr1, dv1 = r1[j] - r1[i], v1[j] - v1[i]
+
+    #straight line closest approach as the starting guess
+    speed_sq = np.einsum('ij,ij->i', dv0, dv0)
+    s = -np.einsum('ij,ij->i', dr0, dv0) / np.where(speed_sq > 0, speed_sq, 1.0) / dt
+    s = np.clip(s, 0.0, 1.0)
+
+    #Newton iterations on d/ds |p|^2 = 0
+    for n in range(newton_iterations):
+        p, dp, ddp = _hermite(s, dr0, dv0, dr1, dv1, dt)
+        slope = np.einsum('ij,ij->i', p, dp)
+        curvature = np.einsum('ij,ij->i', dp, dp) + np.einsum('ij,ij->i', p, ddp)
+        step = np.where(curvature > 0, slope / np.where(curvature > 0, curvature, 1.0), 0.0)
+        s = np.clip(s - step, 0.0, 1.0)
+
+    p, dp, _ = _hermite(s, dr0, dv0, dr1, dv1, dt)
+    miss = np.sqrt(np.einsum('ij,ij->i', p, p))
+    close = miss <= threshold
+
+    events = np.zeros(int(close.sum()), dtype=conjunction_dtype)
+    events["object_1"] = i[close]
+    events["object_2"] = j[close]
+    events["tca"] = t0 + s[close] * dt
+    events["miss_distance"] = miss[close]
+    events["relative_speed"] = np.sqrt(np.einsum('ij,ij->i', dp[close], dp[close])) / dt
+    return events
+
+
+#Keeps the closest approach of each encounter, an encounter being a run of events for the same pair
+#no more than gap seconds apart (co-orbiting objects would otherwise be reported on every interval)
+def merge_events(events, gap):
+
+    if len(events) == 0:
+        return events
+
+    events = events[np.lexsort((events["tca"], events["object_2"], events["object_1"]))]
+
+    new_encounter = np.ones(len(events), dtype=bool)
+    new_encounter[1:] = ((events["object_1"][1:] != events["object_1"][:-1]) |
+                         (events["object_2"][1:] != events["object_2"][:-1]) |
+                         (np.diff(events["tca"]) > gap))
+    encounter = np.cumsum(new_encounter) - 1
+
+    #smallest miss distance within each encounter
+    order = np.lexsort((events["miss_distance"], encounter))
+    first = np.ones(len(order), dtype=bool)
+    first[1:] = encounter[order][1:] != encounter[order][:-1]
+
+    closest = events[order[first]]
+    return closest[np.argsort(closest["tca"], kind="stable")]
+
+
+#Screens a stream of (ts, rs, vs) chunks on a uniform time grid with rs, vs shaped (N, chunk, 3),
+#such as BatchOrbitPropagator.propagate_chunks, returns a conjunction_dtype array ordered by TCA
+def screen_chunks(chunks, threshold=5.0):
+
+    events = []
+    previous = None
+    dt = None
+
+    for ts, rs, vs in chunks:
+
+        #the last sample of the previous chunk starts the first interval of this one
+        if previous is not None:
+            ts = np.concatenate(([previous[0]], ts))
+            rs = np.concatenate((previous[1], rs), axis=1)
+            vs = np.concatenate((previous[2], vs), axis=1)
+
+        for k in range(ts.size - 1):
+            dt = ts[k + 1] - ts[k]
+            events.append(screen_interval(ts[k], dt, rs[:, k], vs[:, k], rs[:, k + 1], vs[:, k + 1], threshold))
+
+        previous = (ts[-1], rs[:, -1:], vs[:, -1:])
+
+    if not events:
+        return np.zeros(0, dtype=conjunction_dtype)
+
+    return merge_events(np.concatenate(events), 2.0 * dt)
+
+
+def _screen_window(r0s, v0s, start, stop, dt, threshold, mu, chunk_size):
+
+    #samples start..stop inclusive so neighbouring windows share their boundary sample
+    def chunks():
+        for first in range(start, stop + 1, chunk_size):
+            ts = np.arange(first, min(first + chunk_size, stop + 1)) * dt
+            ys = n_orbits.kepler_propagate(r0s, v0s, ts, mu=mu)
+            yield ts, ys[:, :, :3], ys[:, :, 3:]
+
+    return screen_chunks(chunks(), threshold)
+
+
+#Screens a whole catalog over duration seconds with two body propagation of the (N, 3) initial states
+#the time span is split into windows that are screened in parallel worker processes
+def screen_catalog(r0s, v0s, duration=24 * 3600.0, dt=10.0, threshold=5.0, workers=None, chunk_size=60, cb=planetary_data.earth):
+
+    r0s = np.asarray(r0s, dtype=float)
+    v0s = np.asarray(v0s, dtype=float)
+
+    n_steps = int(np.ceil(duration / dt))
+    if n_steps <= 0:
+        return np.zeros(0, dtype=conjunction_dtype)
+
+    workers = workers or os.cpu_count() or 1
+
+    #a few windows per worker keeps every process busy until the end
+    n_windows = min(n_steps, 4 * workers)
+    bounds = np.linspace(0, n_steps, n_windows + 1).astype(int)
+    windows = [(r0s, v0s, bounds[w], bounds[w + 1], dt, threshold, cb['mu'], chunk_size) for w in range(n_windows)]
+
+    if workers == 1:
+        results = [_screen_window(*window) for window in windows]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_screen_window, *zip(*windows)))
+
+    return merge_events(np.concatenate(results), 2.0 * dt)
+
+
+#Initial states for a parsed TLE catalog (skyfield_calculations.tle_catalog) at its newest epoch
+#mean elements are used as osculating ones, which is accurate to a few km and fine for screening
+#returns (r0s, v0s, epoch) with epoch as a numpy datetime64
+def catalog_states(catalog, cb=planetary_data.earth):
+
+    epochs = ((catalog["epoch_year"] - 1970).astype('datetime64[Y]').astype('datetime64[us]') +
+              ((catalog["epoch_day"] - 1.0) * 86400e6).astype('timedelta64[us]'))
+    epoch = epochs.max()
+    age = (epoch - epochs) / np.timedelta64(1, 's')
+
+    n = catalog["mean_motion"] * 2 * np.pi / 86400.0 #rad/s
+    a = (cb['mu'] / n**2) ** (1.0 / 3.0)
+    e = catalog["eccentricity"]
+
+    #mean anomaly advanced to the common epoch, then converted to true anomaly
+    Me = np.radians(catalog["mean_anomaly"]) + n * age
+    E = n_orbits.ecc_anomaly([np.mod(Me, 2 * np.pi), e], 'newton')
+    ta = 2 * np.arctan2(np.sqrt(1 + e) * np.sin(E / 2), np.sqrt(1 - e) * np.cos(E / 2))
+
+    coes = np.column_stack([a, e, catalog["inclination"], np.degrees(ta), catalog["argument_of_perigee"], catalog["right_ascension"]])
+    r0s, v0s = n_orbits.coes2rv_batch(coes, deg=True, mu=cb['mu'])
+
+    return r0s, v0s, epoch
@@ -0,0 +1,106 @@
+import numpy as np
+from propagator import planetary_data
+
+#Earth fixed frame and geodetic coordinates for propagated position arrays
+#Positions are (..., T, 3) in km, e.g. OrbitPropagator.rs (T, 3) or BatchOrbitPropagator.ys[:, :, :3] (N, T, 3),
+#with ts the matching (T,) seconds after epoch_jd (a UT1 Julian date, J2000 by default)
+#The ECI to ECEF rotation is about the pole by GMST only, treating the inertial frame as true of date
+#like SGP4's TEME (precession, nutation and polar motion are left out)
+
+j2000 = 2451545.0
+seconds_per_day = 86400.0
+
+
+#Greenwich mean sidereal time (radians) for UT1 Julian dates, IAU 1982 model (Vallado eq. 3-47)
+def gmst(jd_ut1):
+    T = (np.asarray(jd_ut1, dtype=float) - j2000) / 36525.0
+    seconds = 67310.54841 + (876600.0 * 3600.0 + 8640184.812866) * T + 0.093104 * T**2 - 6.2e-6 * T**3
+    return np.radians(np.mod(seconds, seconds_per_day) / 240.0)
+
+
+#GMST cosines and sines for a time grid, worked out once and shared by every satellite on that grid
+#ts may be (T,) or the propagators' (T, 1) column
+def gmst_table(ts, epoch_jd=j2000):
+    theta = gmst(epoch_jd + np.asarray(ts, dtype=float).ravel() / seconds_per_day)
+    return np.cos(theta), np.sin(theta)
+
+
+#Rotates (..., T, 3) inertial positions into the Earth fixed frame
+def eci2ecef(rs, ts=None, epoch_jd=j2000, table=None):
+    cos_t, sin_t = table if table is not None else gmst_table(ts, epoch_jd)
+
+    ecef = np.empty(np.shape(rs))
+    ecef[..., 0] = cos_t * rs[..., 0] + sin_t * rs[..., 1]
+    ecef[..., 1] = -sin_t * rs[..., 0] + cos_t * rs[..., 1]
+    ecef[..., 2] = rs[..., 2]
+    return ecef
+
+
+#Closed form (Heikkinen) geodetic latitude, longitude (degrees) and height (km) for (..., 3) ECEF positions
+def ecef2geodetic(rs, cb=planetary_data.earth):
+
+    #the ellipsoid's own semi-major axis, the flattening alone would leave the mean radius 137 m out
+    a = cb["equatorial_radius"]
+    f = cb["flattening"]
+    b = a * (1.0 - f)
+    e2 = f * (2.0 - f)
+    ep2 = (a**2 - b**2) / b**2
+
+    x, y, z = rs[..., 0], rs[..., 1], rs[..., 2]
+    p = np.hypot(x, y)
+
+    F = 54.0 * b**2 * z**2
+    G = p**2 + (1.0 - e2) * z**2 - e2 * (a**2 - b**2)
+    c = e2**2 * F * p**2 / G**3
+    s = np.cbrt(1.0 + c + np.sqrt(c**2 + 2.0 * c))
+    k = s + 1.0 + 1.0 / s
+    P = F / (3.0 * k**2 * G**2)
+    Q = np.sqrt(1.0 + 2.0 * e2**2 * P)
+    #the root's argument is zero on the poles and rounding can take it just below
+    r0 = -P * e2 * p / (1.0 + Q) + np.sqrt(np.maximum(0.5 * a**2 * (1.0 + 1.0 / Q) - P * (1.0 - e2) * z**2 / (Q * (1.0 + Q)) - 0.5 * P * p**2, 0.0))
+    U = np.sqrt((p - e2 * r0)**2 + z**2)
+    V = np.sqrt((p - e2 * r0)**2 + (1.0 - e2) * z**2)
+    z0 = b**2 * z / (a * V)
+
+    lat = np.degrees(np.arctan2(z + ep2 * z0, p))
+    lon = np.degrees(np.arctan2(y, x))
+    alt = U * (1.0 - b**2 / (a * V))
+
+    return lat, lon, alt
+
+
+#Sub-satellite points for (..., T, 3) inertial positions in one array pass
+#returns latitude and longitude (degrees) and altitude (km), each shaped rs.shape[:-1]
+def ground_track(rs, ts, epoch_jd=j2000, cb=planetary_data.earth):
+    return ecef2geodetic(eci2ecef(rs, ts, epoch_jd), cb)
+
+
+def plot_ground_tracks(lats, lons, labels, show_plot=False, save_plot=False, title="Ground Tracks"):
+
+        #2D map of every track, lats and lons are (N, T) arrays
+        import matplotlib.pyplot as plt
+        fig, ax = plt.subplots(figsize=(12, 6))
+
+        lats = np.atleast_2d(lats)
+        lons = np.atleast_2d(lons).copy()
+
+        #break the line where a track crosses the antimeridian instead of drawing across the map
+        wraps = np.abs(np.diff(lons, axis=-1)) > 180.0
+        lons[:, 1:][wraps] = np.nan
+
+        for n in range(lats.shape[0]):
+            ax.plot(lons[n], lats[n], label=labels[n])
+            ax.plot([lons[n, 0]], [lats[n, 0]], 'ko')
+
+        ax.set_xlim([-180, 180])
+        ax.set_ylim([-90, 90])
+        ax.set_xlabel('Longitude (deg)')
+        ax.set_ylabel('Latitude (deg)')
+        ax.set_title(title)
+        ax.grid(linewidth=0.25)
+        plt.legend()
+
+        if show_plot:
+            plt.show()
+        if save_plot:
+            plt.savefig(title+'.png', dpi=300)
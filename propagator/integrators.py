@@ -0,0 +1,154 @@
+import numpy as np
+from scipy.integrate import ode, RK45, DOP853
+
+
+#Cubic Hermite interpolant across one fixed step, called the same way as scipy's DenseOutput
+#returns (n,) for a scalar time or (n, k) for k times
+class HermiteInterpolant:
+
+    def __init__(self, t_old, t, y_old, y, f_old, f):
+        self.t_old = t_old
+        self.t = t
+        self.y_old = y_old
+        self.y = y
+        self.f_old = f_old
+        self.f = f
+
+    def __call__(self, t):
+        h = self.t - self.t_old
+        s = (np.asarray(t, dtype=float) - self.t_old) / h
+        s2 = s * s
+        s3 = s2 * s
+
+        #Hermite basis functions
+        h00 = 2 * s3 - 3 * s2 + 1
+        h10 = s3 - 2 * s2 + s
+        h01 = -2 * s3 + 3 * s2
+        h11 = s3 - s2
+
+        return (np.multiply.outer(self.y_old, h00) + np.multiply.outer(h * self.f_old, h10) +
+                np.multiply.outer(self.y, h01) + np.multiply.outer(h * self.f, h11))
+
+
+#Classic fixed-step Runge-Kutta 4, follows the scipy OdeSolver step()/dense_output() interface
+class RK4:
+
+    def __init__(self, fun, t0, y0, t_bound, step_size):
+        self.fun = fun
+        self.t = t0
+        self.t_old = None
+        self.y = np.array(y0, dtype=float)
+        self.t_bound = t_bound
+        self.step_size = step_size
+        self.f = np.asarray(fun(t0, self.y), dtype=float)
+        self.status = 'running' if t_bound > t0 else 'finished'
+
+    def step(self):
+        t, y, k1 = self.t, self.y, self.f
+        h = self.step_size
+
+        #land exactly on t_bound rather than leaving a sliver of a step
+        if self.t_bound - (t + h) < 1e-6 * h:
+            h = self.t_bound - t
+
+        k2 = np.asarray(self.fun(t + h / 2, y + h / 2 * k1), dtype=float)
+        k3 = np.asarray(self.fun(t + h / 2, y + h / 2 * k2), dtype=float)
+        k4 = np.asarray(self.fun(t + h, y + h * k3), dtype=float)
+
+        y_new = y + h / 6 * (k1 + 2 * k2 + 2 * k3 + k4)
+        f_new = np.asarray(self.fun(t + h, y_new), dtype=float) #reused as k1 of the next step
+
+        self._interpolant = HermiteInterpolant(t, t + h, y, y_new, k1, f_new)
+        self.t_old, self.t, self.y, self.f = t, t + h, y_new, f_new
+
+        if self.t >= self.t_bound:
+            self.t = self.t_bound
+            self.status = 'finished'
+
+    def dense_output(self):
+        return self._interpolant
+
+
+#Available integrators, the adaptive ones come from scipy and keep their own error control
+solvers = {
+    "rk4": RK4,
+    "rk45": RK45,
+    "dop853": DOP853
+}
+
+
+#Steps the chosen integrator at its own internal step size
+#yields (t_old, t, interpolant) for every internal step taken
+def dense_steps(fun, t0, y0, t_bound, method='dop853', rtol=1e-9, atol=1e-9, max_step=np.inf, step_size=30.0):
+
+    if method not in solvers:
+        print("Invalid integrator")
+        return
+
+    if method == 'rk4':
+        solver = RK4(fun, t0, y0, t_bound, step_size)
+    else:
+        solver = solvers[method](fun, t0, y0, t_bound, rtol=rtol, atol=atol, max_step=max_step)
+
+    while solver.status == 'running':
+        message = solver.step()
+
+        if solver.status == 'failed':
+            print(f"Integration failed: {message}")
+            return
+
+        yield solver.t_old, solver.t, solver.dense_output()
+
+
+#Streams the solution on the uniform grid t = k * dt (k = 0 .. n_steps - 1) in blocks of at most
+#chunk_size samples, yields (ts, ys) so nothing is ever held for the whole span
+#methods outside solvers (e.g. 'lsoda') fall back to scipy's ode.integrate once per dt
+def sample_chunks(fun, y0, dt, n_steps, chunk_size=1000, method='dop853', **options):
+
+    buffer = np.empty((chunk_size, np.size(y0)))
+    buffer[0] = y0
+    filled = 1
+    k = 1 #index of the next output sample
+
+    if n_steps < 2:
+        steps = []
+    elif method in solvers:
+        steps = ((t, interpolant) for t_old, t, interpolant in dense_steps(fun, 0.0, y0, (n_steps - 1) * dt, method, **options))
+    else:
+        steps = _ode_steps(fun, y0, dt, n_steps, method)
+
+    for t, interpolant in steps:
+
+        #output samples covered by this internal step
+        last = min(int(t / dt + 1e-9), n_steps - 1)
+
+        while k <= last:
+            take = min(last - k + 1, chunk_size - filled)
+            buffer[filled:filled + take] = interpolant(np.arange(k, k + take) * dt).T
+            filled += take
+            k += take
+
+            if filled == chunk_size:
+                yield np.arange(k - filled, k) * dt, buffer
+                buffer = np.empty_like(buffer)
+                filled = 0
+
+    if filled:
+        yield np.arange(k - filled, k) * dt, buffer[:filled]
+
+
+#Legacy scipy ode path, integrates exactly to each output time so the "interpolant" is the state itself
+def _ode_steps(fun, y0, dt, n_steps, method):
+
+    solver = ode(fun)
+    solver.set_integrator(method)
+    solver.set_initial_value(y0, 0)
+
+    for k in range(1, n_steps):
+        solver.integrate(k * dt)
+
+        if not solver.successful():
+            return
+
+        y = solver.y.copy()
+        yield solver.t, lambda ts, y=y: np.repeat(y[:, None], np.size(ts), axis=1)
@@ -1,5 +1,4 @@
 import numpy as np
-import matplotlib.pyplot as plt
 from propagator import planetary_data
 import math as m
 
@@ -7,43 +6,13 @@ d2r = np.pi/180.0
 
 
 def plot_n_orbits(rs, labels, cb=planetary_data.earth, show_plot=False, save_plot=False, title="Many Orbits"):
+        #plotting is imported here so the propagator package loads without matplotlib or the GUI
+        import matplotlib.pyplot as plt
+        from gui import orbit_renderer
 
-        #3D plot screen to be represented to the user
-        fig = plt.figure(figsize=(10,10))
-        ax = fig.add_subplot(111,projection='3d')
-        
-        n = 0
-        #plot trajectory and starting point
-        for r in rs:
-            ax.plot(r[:,0], r[:,1], r[:,2], label=labels[n])
-            ax.plot([r[0,0]], [r[0,1]], [r[0,2]],'ko')
-            n += 1 #Determines which orbit is being displayed
-
-        #plot earth
-        r_plot = cb["radius"]
-
-        u = np.linspace(0, 2 * np.pi, 50)
-        v = np.linspace(0, np.pi, 50)
-        x = cb["radius"] * np.outer(np.cos(u), np.sin(v))
-        y = cb["radius"] * np.outer(np.sin(u), np.sin(v))
-        z = cb["radius"] * np.outer(np.ones(np.size(u)), np.cos(v))
-        ax.plot_wireframe(x, y, z, color = "k", linewidth = 0.25)
-
-        #set labels
-        max_val = np.max(np.abs(r))
-        ax.set_xlim([-max_val, max_val])
-        ax.set_ylim([-max_val, max_val])
-        ax.set_zlim([-max_val, max_val])
-
-        #sets titles
-        ax.set_xlabel('X (km)')
-        ax.set_ylabel('Y (km)')
-        ax.set_zlabel('Z (km)')
-
-        #ax.set_aspect('equal')
-
-        ax.set_title(title)
-        plt.legend()
+        #3D plot screen to be represented to the user, reusing the figure and Earth mesh of earlier calls
+        trajectories = [(r, labels[n], {}, {"color": "k", "marker": "o"}) for n, r in enumerate(rs)]
+        orbit_renderer.renderer.draw(title, trajectories, title=title, figsize=(10, 10), cb=cb)
         plt.show()
 
         if show_plot:
@@ -92,32 +61,205 @@ def eci2perif(raan, aop, i):
     return np.array([row0, row1, row2])
 
 
+#Array versions of the conversions above, coes is an (N, 6) array of [a, e, i, ta, aop, raan] rows
+#returns (N, 3) position and velocity vectors
+def coes2rv_batch(coes, deg=False, mu=planetary_data.earth['mu']):
+
+    coes = np.atleast_2d(np.asarray(coes, dtype=float))
+    a, e = coes[:, 0], coes[:, 1]
+
+    if deg:
+        i, ta, aop, raan = (coes[:, 2:] * d2r).T
+    else:
+        i, ta, aop, raan = coes[:, 2:].T
+
+    p = a * (1-e**2) #semi-latus rectum
+    r_norm = p / (1+e * np.cos(ta))
+
+    #calculating r and v vectors in perifocal frame
+    r_perif = np.zeros((coes.shape[0], 3))
+    r_perif[:, 0] = r_norm * np.cos(ta)
+    r_perif[:, 1] = r_norm * np.sin(ta)
+
+    v_perif = np.zeros((coes.shape[0], 3))
+    v_perif[:, 0] = -np.sqrt(mu / p) * np.sin(ta)
+    v_perif[:, 1] = np.sqrt(mu / p) * (e + np.cos(ta))
+
+    #perif2eci is the transpose of eci2perif, so contract over the first index
+    eci2perif_stack = eci2perif_batch(raan, aop, i)
+    r = np.einsum('nji,nj->ni', eci2perif_stack, r_perif)
+    v = np.einsum('nji,nj->ni', eci2perif_stack, v_perif)
+
+    return r, v
+
+
+#Stack of (N, 3, 3) ECI to perifocal rotation matrices
+def eci2perif_batch(raan, aop, i):
+    sr, cr = np.sin(raan), np.cos(raan)
+    sa, ca = np.sin(aop), np.cos(aop)
+    si, ci = np.sin(i), np.cos(i)
+
+    matrices = np.empty(np.shape(raan) + (3, 3))
+    matrices[..., 0, 0] = -sr*ci*sa + cr*ca
+    matrices[..., 0, 1] = cr*ci*sa + sr*ca
+    matrices[..., 0, 2] = si*sa
+    matrices[..., 1, 0] = -sr*ci*ca - cr*sa
+    matrices[..., 1, 1] = cr*ci*ca - sr*sa
+    matrices[..., 1, 2] = si*ca
+    matrices[..., 2, 0] = sr*si
+    matrices[..., 2, 1] = -cr*si
+    matrices[..., 2, 2] = ci
+
+    return matrices
+
+
+#Inverse conversion, (N, 3) r and v vectors to (N, 6) [a, e, i, ta, aop, raan] rows
+#angles come back in [0, 2pi), undefined angles (circular or equatorial orbits) are returned as 0
+#and the angles left are measured from the x axis or the node instead, so the position still round-trips
+def rv2coes_batch(rs, vs, deg=False, mu=planetary_data.earth['mu'], tol=1e-10):
+
+    rs = np.atleast_2d(np.asarray(rs, dtype=float))
+    vs = np.atleast_2d(np.asarray(vs, dtype=float))
+
+    r_norm = np.sqrt(np.einsum('ij,ij->i', rs, rs))
+    v_sq = np.einsum('ij,ij->i', vs, vs)
+    rdotv = np.einsum('ij,ij->i', rs, vs)
+
+    #angular momentum, node and eccentricity vectors
+    h = np.cross(rs, vs)
+    h_norm = np.sqrt(np.einsum('ij,ij->i', h, h))
+    node = np.stack([-h[:, 1], h[:, 0], np.zeros_like(h_norm)], axis=1)
+    node_norm = np.sqrt(np.einsum('ij,ij->i', node, node))
+    e_vec = ((v_sq - mu / r_norm)[:, None] * rs - rdotv[:, None] * vs) / mu
+
+    a = 1.0 / (2.0 / r_norm - v_sq / mu)
+    e = np.sqrt(np.einsum('ij,ij->i', e_vec, e_vec))
+    i = np.arccos(np.clip(h[:, 2] / h_norm, -1.0, 1.0))
+
+    #equatorial orbits have no node, raan is 0 and the x axis stands in for the node
+    equatorial = node_norm <= tol * h_norm
+    raan = np.where(equatorial, 0.0, np.arctan2(node[:, 1], node[:, 0]))
+    node = np.where(equatorial[:, None], [1.0, 0.0, 0.0], node)
+
+    #circular orbits have no periapsis, aop is 0 and ta is measured from the node
+    periapsis = np.where((e <= tol)[:, None], node, e_vec)
+
+    #signed angles measured about the angular momentum vector
+    aop = np.arctan2(np.einsum('ij,ij->i', np.cross(node, periapsis), h) / h_norm, np.einsum('ij,ij->i', node, periapsis))
+    ta = np.arctan2(np.einsum('ij,ij->i', np.cross(periapsis, rs), h) / h_norm, np.einsum('ij,ij->i', periapsis, rs))
+
+    angles = np.mod(np.stack([i, ta, aop, raan], axis=1), 2 * np.pi)
+    if deg:
+        angles /= d2r
+
+    return np.column_stack([a, e, angles])
+
+
 def ecc_anomaly(arr, method, tol=1e-8):
+    #Single orbits stay on floats and the math module, wrapping them in 0-d arrays costs far more than the solve
+    if isinstance(arr[0], (int, float)) and isinstance(arr[1], (int, float)):
+        return ecc_anomaly_scalar(arr[0], arr[1], method, tol)
+
     if method == "newton":
 
-        #Iteratively Finding E via Newton's Method
-        Me, e = arr
-        if Me < np.pi / 2.0: 
-            E0 = Me+e/2.0
-        else:
-            E0 = Me-e
+        #Iteratively Finding E via Newton's Method, Me and e may be scalars or arrays
+        Me, e = np.broadcast_arrays(np.asarray(arr[0], dtype=float), np.asarray(arr[1], dtype=float))
+
+        #Danby's starting guess converges for every e < 1 without wrapping Me
+        E0 = Me + 0.85 * e * np.sign(np.sin(Me))
 
         for n in range(200): #Number of steps
             ratio = (E0-e * np.sin(E0)-Me) / (1-e*np.cos(E0))
-            if abs(ratio) < tol:
-                if n == 0:
-                    return E0
-                else:
-                    return E1
-            else:
-                E1 = E0-ratio
-                E0 = E1
+            E0 = E0-ratio
+            if np.all(np.abs(ratio) < tol):
+                break
+        else:
+            #Entries which never converged are marked as nan rather than failing the whole array
+            print("Eccentric anomaly did not converge")
+            E0 = np.where(np.abs(ratio) < tol, E0, np.nan)
 
-        return False
+        return E0 if E0.ndim else float(E0)
 
     elif method == "tae":
-        ta, e = arr
-        return 2 * m.atan(m.sqrt(1-e) / (1+e)) * m.tan(ta/2.0)
+        ta, e = np.asarray(arr[0], dtype=float), np.asarray(arr[1], dtype=float)
+        E = 2 * np.arctan2(np.sqrt(1-e) * np.sin(ta/2.0), np.sqrt(1+e) * np.cos(ta/2.0))
+        return E if E.ndim else float(E)
     
     else:
         print("Invalid method")
+
+
+#Same solutions as the array path above for one float Me or ta and e
+def ecc_anomaly_scalar(x, e, method, tol=1e-8):
+    if method == "newton":
+        Me = x
+        s = m.sin(Me)
+        E0 = Me + 0.85 * e * ((s > 0) - (s < 0))
+
+        for n in range(200): #Number of steps
+            ratio = (E0-e * m.sin(E0)-Me) / (1-e*m.cos(E0))
+            E0 = E0-ratio
+            if abs(ratio) < tol:
+                return E0
+
+        print("Eccentric anomaly did not converge")
+        return m.nan
+
+    elif method == "tae":
+        ta = x
+        return 2 * m.atan2(m.sqrt(1-e) * m.sin(ta/2.0), m.sqrt(1+e) * m.cos(ta/2.0))
+
+    else:
+        print("Invalid method")
+
+
+#Closed-form two body propagation, advances the mean anomaly and solves Kepler's equation
+#r0s, v0s -> (N, 3) initial states, ts -> (T,) seconds since the initial state
+#returns (N, T, 6) states, works for elliptical orbits only
+def kepler_propagate(r0s, v0s, ts, mu=planetary_data.earth['mu'], tol=1e-8):
+
+    r0s = np.atleast_2d(np.asarray(r0s, dtype=float))
+    v0s = np.atleast_2d(np.asarray(v0s, dtype=float))
+    ts = np.asarray(ts, dtype=float).ravel()
+
+    r0 = np.sqrt(np.einsum('ij,ij->i', r0s, r0s))
+    v0_sq = np.einsum('ij,ij->i', v0s, v0s)
+    rdotv = np.einsum('ij,ij->i', r0s, v0s)
+
+    #semi-major axis from the vis-viva equation
+    a = 1.0 / (2.0 / r0 - v0_sq / mu)
+    if np.any(a <= 0):
+        print("Kepler propagation only supports elliptical orbits")
+        a = np.where(a > 0, a, np.nan)
+
+    n = np.sqrt(mu / a**3) #mean motion (rad/s)
+
+    #initial eccentric and mean anomaly
+    ecosE0 = 1.0 - r0 / a
+    esinE0 = rdotv / np.sqrt(mu * a)
+    e = np.hypot(ecosE0, esinE0)
+    E0 = np.arctan2(esinE0, ecosE0)
+    M0 = E0 - esinE0
+
+    #advance mean anomaly for every (satellite, time) pair at once
+    Me = M0[:, None] + n[:, None] * ts[None, :]
+    E = ecc_anomaly([Me, e[:, None]], 'newton', tol)
+
+    dE = E - E0[:, None]
+    cos_dE = np.cos(dE)
+    sin_dE = np.sin(dE)
+    a = a[:, None]
+    r0 = r0[:, None]
+    r = a * (1.0 - e[:, None] * np.cos(E))
+
+    #Lagrange f and g coefficients
+    f = 1.0 - a / r0 * (1.0 - cos_dE)
+    g = ts[None, :] - (dE - sin_dE) / n[:, None]
+    f_dot = -np.sqrt(mu * a) / (r * r0) * sin_dE
+    g_dot = 1.0 - a / r * (1.0 - cos_dE)
+
+    ys = np.empty((r0s.shape[0], ts.size, 6))
+    ys[:, :, :3] = f[:, :, None] * r0s[:, None, :] + g[:, :, None] * v0s[:, None, :]
+    ys[:, :, 3:] = f_dot[:, :, None] * r0s[:, None, :] + g_dot[:, :, None] * v0s[:, None, :]
+
+    return ys
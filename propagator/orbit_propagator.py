@@ -1,16 +1,19 @@
 import numpy as np
-import matplotlib.pyplot as plt
-from scipy.integrate import ode
 from propagator import planetary_data
 from propagator import n_orbits
+from propagator import integrators
+from instrumentation import metrics
 import math
 
 pi = math.pi
 cb = planetary_data.earth
 
+rhs_evaluations = metrics.registry.counter("propagator_rhs_evaluations_total", "Equations of motion evaluations", {"propagator": "single"})
+batch_rhs_evaluations = metrics.registry.counter("propagator_rhs_evaluations_total", "Equations of motion evaluations", {"propagator": "batch"})
+
 class OrbitPropagator:
 
-    def __init__(self, state0, tspan, dt, coes=False, cb=planetary_data.earth):
+    def __init__(self, state0, tspan, dt, coes=False, cb=planetary_data.earth, integrator='lsoda', integrator_options=None, perts=None):
 
         if coes:
             self.r0, self.v0 =n_orbits.coes2rv(state0, deg=True, mu=cb['mu'])
@@ -21,33 +24,55 @@ class OrbitPropagator:
         self.tspan = tspan
         self.dt = dt 
         self.cb = cb
+        self.integrator = integrator
+        self.integrator_options = integrator_options or {}
 
-        self.n_steps = int(np.ceil(self.tspan / self.dt))
+        #perturbing force terms from propagator.perturbations, each called as term(t, rs, vs)
+        self.perts = perts or []
+        if self.perts and self.integrator == 'kepler':
+            print("Kepler propagation is two body only, perturbations are ignored")
 
-        #initialise variables   
-        self.ys = np.zeros((self.n_steps, 6)) #6 states, 60 rows wide by 6 columns
-        self.ts = np.zeros((self.n_steps, 1))
+        self.n_steps = int(np.ceil(self.tspan / self.dt))
 
-        #intial conditions
+        #intial conditions, output arrays are only allocated by propagate_orbit
         self.y0 = np.concatenate((self.r0, self.v0))
-        self.ys[0] = np.array(self.y0)
-        self.step = 1
+        self.ys = None
+        self.ts = None
+        self.step = 0
+
 
-        #solver
-        self.solver = ode(self.diffy_q)
-        self.solver.set_integrator('lsoda') #fastest ODE according to the tutorial
-        self.solver.set_initial_value(self.y0, 0)
+    def propagate_chunks(self, chunk_size=1000):
 
+        #yields (ts, rs, vs) blocks of at most chunk_size samples on the dt grid
+        #so consumers can process a long propagation while memory stays flat
 
+        if self.integrator == 'kepler':
+            for start in range(0, self.n_steps, chunk_size):
+                ts = np.arange(start, min(start + chunk_size, self.n_steps)) * self.dt
+                ys = n_orbits.kepler_propagate(self.r0, self.v0, ts, mu=self.cb['mu'])[0]
+                yield ts, ys[:, :3], ys[:, 3:]
+        else:
+            #rk4/rk45/dop853 take their own steps and fill the dt grid from dense output, lsoda integrates once per dt
+            for ts, ys in integrators.sample_chunks(self.diffy_q, self.y0, self.dt, self.n_steps, chunk_size, self.integrator, **self.integrator_options):
+                yield ts, ys[:, :3], ys[:, 3:]
+
+
+    @metrics.timed("propagate_orbit_seconds", "Wall time of propagate_orbit", {"propagator": "single"})
     def propagate_orbit(self):
 
-        #propagate orbit
+        #propagate orbit, collecting every chunk into the full span
+
+        #initialise variables   
+        self.ys = np.zeros((self.n_steps, 6)) #6 states, 60 rows wide by 6 columns
+        self.ts = np.zeros((self.n_steps, 1))
+        self.step = 0
 
-        while self.solver.successful() and self.step < self.n_steps:
-            self.solver.integrate(self.solver.t + self.dt)
-            self.ts[self.step] = self.solver.t #step will be initially set to one, so use a variable to not override the conditons
-            self.ys[self.step] = self.solver.y
-            self.step += 1
+        for ts, rs, vs in self.propagate_chunks():
+            n = ts.size
+            self.ts[self.step:self.step + n, 0] = ts
+            self.ys[self.step:self.step + n, :3] = rs
+            self.ys[self.step:self.step + n, 3:] = vs
+            self.step += n
 
         self.rs = self.ys[:, :3] #all the rows in column 1 and 2
         self.vs = self.ys[:,3:]
@@ -60,6 +85,9 @@ class OrbitPropagator:
         #y -> state
         #mu -> additional parameter
 
+        if metrics.enabled:
+            rhs_evaluations.inc()
+
         rx, ry, rz, vx, vy, vz = y
         self.r = np.array([rx, ry, rz]) #Changes the format to a vector
 
@@ -71,6 +99,15 @@ class OrbitPropagator:
         ay = -self.cb['mu'] * ry / norm_r**3
         az = -self.cb['mu'] * rz / norm_r**3
 
+        #perturbations are evaluated as a batch of one
+        if self.perts:
+            rs = self.r[None, :]
+            vs = np.array([[vx, vy, vz]])
+            a_pert = sum(pert(t, rs, vs) for pert in self.perts)[0]
+            ax += a_pert[0]
+            ay += a_pert[1]
+            az += a_pert[2]
+
         return [vx, vy, vz, ax, ay, az] #derivative of position is velocity
 
         #r is pointing from the centre of the earth to your
@@ -78,49 +115,120 @@ class OrbitPropagator:
 
 
     def plot_3d(self, show_plot=False, save_plot=False, title="Test"):
+        #plotting is imported here so the propagator package loads without matplotlib or the GUI
+        import matplotlib.pyplot as plt
+        from gui import orbit_renderer
+
+        #3D plot screen to be represented to the user, the figure and Earth mesh are reused between calls
+        #and the trajectory is thinned to the renderer's point budget
+        orbit_renderer.renderer.draw(title, [(self.rs, title, {"color": "k"}, {"color": "k", "marker": "o"})],
+                                     title=title, figsize=(10, 10), cb=self.cb)
+        plt.show()
 
-        #3D plot screen to be represented to the user
-        fig = plt.figure(figsize=(10,10))
-        ax = fig.add_subplot(111,projection='3d')
-        
-        #plot trajectory and starting point
-        ax.plot(self.rs[:,0], self.rs[:,1], self.rs[:,2], 'k-')
-        ax.plot([self.rs[0,0]], [self.rs[0,1]], [self.rs[0,2]],'ko')
+        if show_plot:
+            plt.show()
+        if save_plot:
+            plt.savefig(title+'.png', dpi=300)
 
-        #plot earth
-        r_plot = self.cb["radius"]
 
-        u = np.linspace(0, 2 * np.pi, 50)
-        v = np.linspace(0, np.pi, 50)
-        x = self.cb["radius"] * np.outer(np.cos(u), np.sin(v))
-        y = self.cb["radius"] * np.outer(np.sin(u), np.sin(v))
-        z = self.cb["radius"] * np.outer(np.ones(np.size(u)), np.cos(v))
-        ax.plot_wireframe(x, y, z, color = "k", linewidth = 0.25)
 
 
-        #check for custom axes limits
-        max_val = np.max(np.abs(self.r))
+#Vectorised two body acceleration for a stack of position vectors
+#rs -> (N, 3) positions, returns (N, 3) accelerations
+def two_body_acceleration(rs, mu):
+    norm_r = np.sqrt(np.einsum('ij,ij->i', rs, rs))
+    return -mu * rs / (norm_r ** 3)[:, None]
 
-        #set labels
-        max_val = np.max(np.abs(self.r))
-        ax.set_xlim([-max_val, max_val])
-        ax.set_ylim([-max_val, max_val])
-        ax.set_zlim([-max_val, max_val])
 
-        #sets titles
-        ax.set_xlabel('X (km)')
-        ax.set_ylabel('Y (km)')
-        ax.set_zlabel('Z (km)')
+class BatchOrbitPropagator:
 
-        #ax.set_aspect('equal')
+    #Propagates N satellites together as a single (N * 6) state so the whole
+    #catalog costs a few NumPy calls per RHS evaluation instead of N Python ODE loops
+    def __init__(self, states0, tspan, dt, coes=False, cb=planetary_data.earth, integrator='dop853', integrator_options=None, perts=None):
 
-        ax.set_title(title)
-        plt.legend()
-        plt.show()
+        states0 = np.atleast_2d(np.asarray(states0, dtype=float))
 
-        if show_plot:
-            plt.show()
-        if save_plot:
-            plt.savefig(title+'.png', dpi=300)
+        if coes:
+            #each row is [a, e, i, ta, aop, raan] in degrees
+            self.r0s, self.v0s = n_orbits.coes2rv_batch(states0, deg=True, mu=cb['mu'])
+        else:
+            self.r0s = states0[:, :3]
+            self.v0s = states0[:, 3:]
+
+        self.tspan = tspan
+        self.dt = dt
+        self.cb = cb
+        self.integrator = integrator
+        self.integrator_options = integrator_options or {}
+
+        #perturbing force terms from propagator.perturbations, each called as term(t, rs, vs)
+        self.perts = perts or []
+        if self.perts and self.integrator == 'kepler':
+            print("Kepler propagation is two body only, perturbations are ignored")
+        self.n_sats = self.r0s.shape[0]
+
+        self.n_steps = int(np.ceil(self.tspan / self.dt))
+
+        #intial conditions, output arrays are only allocated by propagate_orbit
+        self.y0 = np.concatenate((self.r0s, self.v0s), axis=1)
+        self.ys = None
+        self.ts = None
+        self.step = 0
+
+
+    def propagate_chunks(self, chunk_size=1000):
+
+        #yields (ts, rs, vs) blocks with rs and vs shaped (N, chunk, 3)
+        #so consumers can process a long propagation while memory stays flat
+
+        if self.integrator == 'kepler':
+            for start in range(0, self.n_steps, chunk_size):
+                ts = np.arange(start, min(start + chunk_size, self.n_steps)) * self.dt
+                ys = n_orbits.kepler_propagate(self.r0s, self.v0s, ts, mu=self.cb['mu'])
+                yield ts, ys[:, :, :3], ys[:, :, 3:]
+        else:
+            #the solver works on the flattened state of every satellite
+            #dop853 is used by default as lsoda can switch to a dense (6N x 6N) jacobian for large batches
+            for ts, ys in integrators.sample_chunks(self.diffy_q, self.y0.ravel(), self.dt, self.n_steps, chunk_size, self.integrator, **self.integrator_options):
+                ys = ys.reshape(ts.size, self.n_sats, 6).transpose(1, 0, 2) #(T, N * 6) to (N, T, 6)
+                yield ts, ys[:, :, :3], ys[:, :, 3:]
+
+
+    @metrics.timed("propagate_orbit_seconds", "Wall time of propagate_orbit", {"propagator": "batch"})
+    def propagate_orbit(self):
+
+        #propagate every satellite at once, collecting every chunk into the full span
+
+        #initialise variables, one (T, 6) trajectory per satellite
+        self.ys = np.zeros((self.n_sats, self.n_steps, 6))
+        self.ts = np.zeros((self.n_steps, 1))
+        self.step = 0
+
+        for ts, rs, vs in self.propagate_chunks():
+            n = ts.size
+            self.ts[self.step:self.step + n, 0] = ts
+            self.ys[:, self.step:self.step + n, :3] = rs
+            self.ys[:, self.step:self.step + n, 3:] = vs
+            self.step += n
+
+        self.rs = self.ys[:, :, :3] #(N, T, 3)
+        self.vs = self.ys[:, :, 3:]
+
+
+    def diffy_q(self, t, y):
+
+        if metrics.enabled:
+            batch_rhs_evaluations.inc()
+
+        #unpack the flattened state into one row per satellite
+        state = y.reshape(self.n_sats, 6)
+
+        dy = np.empty_like(state)
+        dy[:, :3] = state[:, 3:] #derivative of position is velocity
+        dy[:, 3:] = two_body_acceleration(state[:, :3], self.cb['mu'])
 
+        #each perturbation covers the whole batch in one call
+        for pert in self.perts:
+            dy[:, 3:] += pert(t, state[:, :3], state[:, 3:])
 
+        return dy.ravel()
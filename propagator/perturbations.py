@@ -0,0 +1,158 @@
+import numpy as np
+from propagator import planetary_data
+
+d2r = np.pi/180.0
+as2r = d2r/3600.0 #arcseconds to radians
+
+#Every force term is called as term(t, rs, vs) with (N, 3) positions and velocities
+#and returns the (N, 3) perturbing acceleration in km/s^2, so one call covers a whole batch
+
+
+#Zonal harmonics J2 up to J6 from the Legendre polynomial recursion
+class ZonalHarmonics:
+
+    def __init__(self, cb=planetary_data.earth, degree=6):
+        self.cb = cb
+        self.degree = degree
+
+        #mu * Jn * R^n is constant for the central body so it is only computed once
+        self.coefficients = np.array([0.0, 0.0] + [cb['mu'] * cb[f'J{n}'] * cb['radius']**n for n in range(2, degree + 1)])
+
+    def __repr__(self):
+        return f"ZonalHarmonics(cb={self.cb['name']}, degree={self.degree})"
+
+    def __call__(self, t, rs, vs):
+        r = np.sqrt(np.einsum('ij,ij->i', rs, rs))
+        s = rs[:, 2] / r #sine of geocentric latitude
+
+        #P_n(s) and P_n'(s) built up degree by degree
+        p_prev, p = np.ones_like(s), s
+        dp_prev, dp = np.zeros_like(s), np.ones_like(s)
+
+        radial = np.zeros_like(s)
+        polar = np.zeros_like(s)
+
+        for n in range(1, self.degree):
+            p_prev, p = p, ((2 * n + 1) * s * p - n * p_prev) / (n + 1)
+            dp_prev, dp = dp, dp_prev + (2 * n + 1) * p_prev
+
+            #degree m = n + 1: a_m = mu Jm R^m / r^(m+2) * [((m+1) Pm + s Pm') r_hat - Pm' z_hat]
+            scale = self.coefficients[n + 1] / r**(n + 4)
+            radial += scale * ((n + 2) * p + s * dp)
+            polar -= scale * dp
+
+        accel = radial[:, None] * rs
+        accel[:, 2] += polar * r
+        return accel
+
+
+#Exponential atmosphere drag using the TLE B* term (1/earth radii)
+class AtmosphericDrag:
+
+    #reference density used by SGP4 to define B*, 2.461e-8 kg/m^3 at 120 km times one earth radius (kg/m^2/earth radii)
+    rho_ref = 0.15696615
+
+    def __init__(self, bstar, cb=planetary_data.earth):
+        self.cb = cb
+
+        #B* = (Cd * A / m) * rho_ref / 2 so the ballistic coefficient Cd * A / m (m^2/kg) follows directly
+        #bstar may be a scalar or one value per satellite in the batch
+        self.bstar = np.asarray(bstar, dtype=float)
+        self.ballistic = 2.0 * self.bstar / self.rho_ref
+
+        table = np.array(cb['atmosphere'], dtype=float)
+        self.base_altitudes = table[:, 0]
+        self.base_densities = table[:, 1]
+        self.scale_heights = table[:, 2]
+        self.omega = np.array([0.0, 0.0, cb['omega']])
+
+    def __repr__(self):
+        return f"AtmosphericDrag(cb={self.cb['name']}, bstar={self.bstar.tolist()})"
+
+    def density(self, altitudes):
+        layer = np.clip(np.searchsorted(self.base_altitudes, altitudes, side='right') - 1, 0, len(self.base_altitudes) - 1)
+        return self.base_densities[layer] * np.exp(-(altitudes - self.base_altitudes[layer]) / self.scale_heights[layer])
+
+    def __call__(self, t, rs, vs):
+        altitudes = np.sqrt(np.einsum('ij,ij->i', rs, rs)) - self.cb['radius']
+        rho = self.density(altitudes)
+
+        #velocity relative to the co-rotating atmosphere
+        v_rel = vs - np.cross(self.omega, rs)
+        v_rel_norm = np.sqrt(np.einsum('ij,ij->i', v_rel, v_rel))
+
+        #kg/m^3 * m^2/kg leaves 1/m, the factor of 1000 converts it to 1/km
+        return (-0.5 * 1000.0 * self.ballistic * rho * v_rel_norm)[:, None] * v_rel
+
+
+#Low precision Sun position (Montenbruck & Gill), equatorial frame in km
+def sun_position(jd):
+    T = (jd - 2451545.0) / 36525.0
+    M = (357.5256 + 35999.049 * T) * d2r
+
+    lon = (282.94 + 357.5256 + 35999.049 * T) * d2r + (6892 * np.sin(M) + 72 * np.sin(2 * M)) * as2r
+    r = (149.619 - 2.499 * np.cos(M) - 0.021 * np.cos(2 * M)) * 1e6
+
+    return _ecliptic_to_equatorial(r, lon, 0.0)
+
+
+#Low precision Moon position (Montenbruck & Gill), equatorial frame in km
+def moon_position(jd):
+    T = (jd - 2451545.0) / 36525.0
+
+    L0 = (218.31617 + 481267.88088 * T - 1.3972 * T) * d2r
+    l = (134.96292 + 477198.86753 * T) * d2r
+    lp = (357.52543 + 35999.04944 * T) * d2r
+    F = (93.27283 + 483202.01873 * T) * d2r
+    D = (297.85027 + 445267.11135 * T) * d2r
+
+    lon = L0 + (22640 * np.sin(l) + 769 * np.sin(2 * l) - 4586 * np.sin(l - 2 * D) + 2370 * np.sin(2 * D)
+                - 668 * np.sin(lp) - 412 * np.sin(2 * F) - 212 * np.sin(2 * l - 2 * D) - 206 * np.sin(l + lp - 2 * D)
+                + 192 * np.sin(l + 2 * D) - 165 * np.sin(lp - 2 * D) + 148 * np.sin(l - lp) - 125 * np.sin(D)
+                - 110 * np.sin(l + lp) - 55 * np.sin(2 * F - 2 * D)) * as2r
+
+    lat = (18520 * np.sin(F + lon - L0 + (412 * np.sin(2 * F) + 541 * np.sin(lp)) * as2r)
+           - 526 * np.sin(F - 2 * D) + 44 * np.sin(l + F - 2 * D) - 31 * np.sin(-l + F - 2 * D)
+           - 25 * np.sin(-2 * l + F) - 23 * np.sin(lp + F - 2 * D) + 21 * np.sin(-l + F)
+           + 11 * np.sin(-lp + F - 2 * D)) * as2r
+
+    r = (385000 - 20905 * np.cos(l) - 3699 * np.cos(2 * D - l) - 2956 * np.cos(2 * D) - 570 * np.cos(2 * l)
+         + 246 * np.cos(2 * l - 2 * D) - 205 * np.cos(lp - 2 * D) - 171 * np.cos(l + 2 * D)
+         - 152 * np.cos(l + lp - 2 * D))
+
+    return _ecliptic_to_equatorial(r, lon, lat)
+
+
+def _ecliptic_to_equatorial(r, lon, lat):
+    eps = 23.43929111 * d2r #obliquity of the ecliptic
+    x = r * np.cos(lon) * np.cos(lat)
+    y = r * np.sin(lon) * np.cos(lat)
+    z = r * np.sin(lat)
+    return np.array([x, y * np.cos(eps) - z * np.sin(eps), y * np.sin(eps) + z * np.cos(eps)])
+
+
+ephemerides = {
+    "Sun": sun_position,
+    "Moon": moon_position
+}
+
+
+#Point mass third body perturbation (Sun or Moon), epoch_jd is the Julian date at t = 0
+class ThirdBody:
+
+    def __init__(self, body=planetary_data.sun, epoch_jd=2451545.0):
+        self.body = body
+        self.mu = body['mu']
+        self.epoch_jd = epoch_jd
+        self.position = ephemerides[body['name']]
+
+    def __repr__(self):
+        return f"ThirdBody(body={self.body['name']}, epoch_jd={self.epoch_jd})"
+
+    def __call__(self, t, rs, vs):
+        #the body's position is shared by every satellite at time t
+        r_body = self.position(self.epoch_jd + t / 86400.0)
+        r_rel = r_body - rs
+
+        d_rel = np.sqrt(np.einsum('ij,ij->i', r_rel, r_rel))
+        return self.mu * (r_rel / (d_rel**3)[:, None] - r_body / np.linalg.norm(r_body)**3)
@@ -1,8 +1,47 @@
+
 #Earth details
 earth = {
     "name":"Earth",
     "mass": 5.972e24,
     "mu": 398600.0,
-    "radius": 6378.0
+    "radius": 6378.0,
+    "equatorial_radius": 6378.137, #WGS84 ellipsoid semi-major axis
+    "flattening": 1 / 298.257223563, #WGS84 ellipsoid
+    "omega": 7.292115e-5, #rotation rate (rad/s)
+
+    #zonal harmonic coefficients
+    "J2": 1.08262668e-3,
+    "J3": -2.53265649e-6,
+    "J4": -1.61962159e-6,
+    "J5": -2.27296083e-7,
+    "J6": 5.40681239e-7,
+
+    #exponential atmosphere (Vallado): base altitude (km), base density (kg/m^3), scale height (km)
+    "atmosphere": [
+        (0, 1.225, 7.249), (25, 3.899e-2, 6.349), (30, 1.774e-2, 6.682),
+        (40, 3.972e-3, 7.554), (50, 1.057e-3, 8.382), (60, 3.206e-4, 7.714),
+        (70, 8.770e-5, 6.549), (80, 1.905e-5, 5.799), (90, 3.396e-6, 5.382),
+        (100, 5.297e-7, 5.877), (110, 9.661e-8, 7.263), (120, 2.438e-8, 9.473),
+        (130, 8.484e-9, 12.636), (140, 3.845e-9, 16.149), (150, 2.070e-9, 22.523),
+        (180, 5.464e-10, 29.740), (200, 2.789e-10, 37.105), (250, 7.248e-11, 45.546),
+        (300, 2.418e-11, 53.628), (350, 9.518e-12, 53.298), (400, 3.725e-12, 58.515),
+        (450, 1.585e-12, 60.828), (500, 6.967e-13, 63.822), (600, 1.454e-13, 71.835),
+        (700, 3.614e-14, 88.667), (800, 1.170e-14, 124.64), (900, 5.245e-15, 181.05),
+        (1000, 3.019e-15, 268.00)
+    ]
 }
 
+#Third bodies
+sun = {
+    "name":"Sun",
+    "mass": 1.989e30,
+    "mu": 1.32712440018e11,
+    "radius": 695700.0
+}
+
+moon = {
+    "name":"Moon",
+    "mass": 7.342e22,
+    "mu": 4902.800066,
+    "radius": 1737.4
+}
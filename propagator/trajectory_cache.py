@@ -0,0 +1,135 @@
+import os
+import threading
+import hashlib
+import json
+import numpy as np
+
+#Content addressed cache of propagated trajectories
+#Each entry is a .npy file named by the hash of everything that determines the result, so any
+#number of views or processes can memory map the same ephemeris instead of re-propagating it
+
+cache_dir = "trajectory_cache"
+
+
+class TrajectoryCache:
+
+    def __init__(self, directory=cache_dir, max_bytes=500 * 1024**2):
+        self.directory = directory
+        self.max_bytes = max_bytes
+
+        #counters
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        os.makedirs(self.directory, exist_ok=True)
+
+    #source is either the two TLE lines or a COE list, perts is the propagator's force model list
+    def make_key(self, source, tspan, dt, integrator, perts=None, integrator_options=None):
+        if isinstance(source, (list, tuple)) and all(isinstance(line, str) for line in source):
+            source = [line.strip() for line in source]
+        else:
+            source = np.asarray(source, dtype=float).tolist()
+
+        description = {
+            "source": source,
+            "tspan": float(tspan),
+            "dt": float(dt),
+            "integrator": integrator,
+            "integrator_options": integrator_options or {},
+            "perts": [repr(pert) for pert in perts or []]
+        }
+
+        encoded = json.dumps(description, sort_keys=True).encode("utf-8")
+        return hashlib.sha256(encoded).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + ".npy")
+
+    #Returns a read-only memory map of the cached states, or None on a miss
+    def get(self, key):
+        path = self._path(key)
+
+        try:
+            ys = np.load(path, mmap_mode='r')
+        except (FileNotFoundError, ValueError):
+            self.misses += 1
+            return None
+
+        #touching the file keeps the most recently used entries out of eviction
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            pass
+        self.hits += 1
+        return ys
+
+    #Writes the states under key and returns them memory mapped from the cache
+    def put(self, key, ys):
+        path = self._path(key)
+
+        #write to a private file first so other processes and threads never map a half written entry
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            np.save(f, np.ascontiguousarray(ys))
+
+        #on Windows an entry that is memory mapped elsewhere cannot be replaced,
+        #the existing file holds the same states so it is kept
+        try:
+            os.replace(tmp_path, path)
+        except OSError:
+            os.remove(tmp_path)
+            if not os.path.exists(path):
+                raise
+
+        self.evict(keep=path)
+        return np.load(path, mmap_mode='r')
+
+    #propagate is called with no arguments on a miss and must return the state array
+    def get_or_propagate(self, key, propagate):
+        ys = self.get(key)
+
+        if ys is None:
+            ys = self.put(key, propagate())
+
+        return ys
+
+    #Least recently used eviction until the cache fits in max_bytes, keep is never removed
+    def evict(self, keep=None):
+        entries = []
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            if name.endswith(".npy") and path != keep:
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        if keep is not None and os.path.exists(keep):
+            total += os.path.getsize(keep)
+
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            except OSError:
+                #still memory mapped (Windows), left for a later eviction
+                continue
+
+            total -= size
+            self.evictions += 1
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0
+        }
@@ -1,7 +1,10 @@
-from skyfield.api import EarthSatellite, load
+from skyfield.api import EarthSatellite
 from propagator import planetary_data
 import math
-from skyfield_calculations import tle_fetcher
+import sqlite3
+import numpy as np
+from skyfield_calculations import tle_cache, timescale
+from database import db_access
 
 cb = planetary_data.earth
 
@@ -11,7 +14,11 @@ earth_mu = cb["mu"]
 geo_altitude = 35786
 pi = math.pi
 
-ts = load.timescale()
+db_path = "satellite_database.db"
+
+#Category codes used by classify_catalog, the labels match classify_orbit's strings
+orbit_regimes = np.array(["LEO (Low Earth Orbit)", "MEO (Medium Earth Orbit)", "GEO (Geostationary Orbit)", "HEO (High Earth Orbit)"])
+inclination_classes = np.array(["", " - Polar", " - Sun-Synchronous"])
 
 def classify_orbit(sat):
     #Orbital parameters
@@ -46,9 +53,64 @@ def classify_orbit(sat):
     return orbit, h, i
 
 
+#Vectorised version of classify_orbit for a whole catalog
+#mean_motion in rev/day and inclination in degrees (TLE_Data columns or a parsed tle_catalog)
+#returns regime and inclination codes indexing orbit_regimes / inclination_classes, plus a and h in km
+def classify_catalog(mean_motion, inclination):
+
+    n = np.asarray(mean_motion, dtype=float)
+    i = np.asarray(inclination, dtype=float)
+
+    a = (earth_mu ** (1 / 3)) / ((2 * pi * n / 86400) ** (2 / 3))  #semi-major axis (km)
+    h = a - earth_radius_km  #approximate altitude (km)
+
+    #Same thresholds and order as classify_orbit
+    regime = np.select([h < 2000, h < geo_altitude, np.abs(h - geo_altitude) < 500], [0, 1, 2], 3).astype(np.int8)
+    inclination_class = np.select([np.abs(i - 90) < 5, (97 < i) & (i < 99)], [1, 2], 0).astype(np.int8)
+
+    return {
+        'regime': regime,
+        'inclination_class': inclination_class,
+        'semi_major_axis_km': a,
+        'altitude_km': h
+    }
+
+
+#Full classify_orbit style strings for arrays of codes
+def orbit_type_labels(regime, inclination_class):
+    return np.char.add(orbit_regimes[regime], inclination_classes[inclination_class])
+
+
+#Classifies every stored TLE and writes TLE_Data.orbit_type back in one bulk update
+def classify_stored_tles(db_path=db_path):
+
+    try:
+        with db_access.get_connection(db_path) as conn:
+            c = conn.cursor()
+
+            c.execute("SELECT tle_id, mean_motion, inclination FROM TLE_Data WHERE mean_motion IS NOT NULL AND inclination IS NOT NULL")
+            rows = np.array(c.fetchall(), dtype=float).reshape(-1, 3)
+
+            if len(rows) == 0:
+                return 0
+
+            classes = classify_catalog(rows[:, 1], rows[:, 2])
+            labels = orbit_type_labels(classes['regime'], classes['inclination_class'])
+
+            c.executemany("UPDATE TLE_Data SET orbit_type = ? WHERE tle_id = ?",
+                          zip(labels.tolist(), rows[:, 0].astype(int).tolist()))
+            conn.commit()
+
+            return len(rows)
+
+    except sqlite3.Error as e:
+        print(f"Database error: {e}")
+        return 0
+
+
 def get_satellite_info(norad_id):
     
-    satellite_data = tle_fetcher.fetch_satellite_tle(norad_id) 
+    satellite_data = tle_cache.fetch_satellite_tle(norad_id) 
 
     #If the returned value is empty, display a relevent error message
     if not satellite_data:
@@ -56,7 +118,7 @@ def get_satellite_info(norad_id):
         return None
     
     returned_norad_id, satellite_name, line1, line2 = satellite_data
-    satellite = EarthSatellite(line1, line2, satellite_name, ts)
+    satellite = EarthSatellite(line1, line2, satellite_name, timescale.get_timescale())
     orbit_type, altitude, inclination = classify_orbit(satellite)
 
     return {
@@ -0,0 +1,177 @@
+import numpy as np
+from skyfield.framelib import itrs
+
+#Rise / culmination / set prediction for many satellites over many ground stations
+#Elevation is evaluated for the whole (station x satellite) matrix on a coarse time grid with one vectorised
+#skyfield call per satellite, then only the grid intervals where something happens are refined by root finding
+#satellites are skyfield EarthSatellite objects, e.g. get_satellite_info(norad_id)['satellite_object']
+#stations are skyfield GeographicPosition objects, e.g. wgs84.latlon(51.5, -0.1, elevation_m=30)
+
+#Times are TT Julian dates, ts.tt_jd() turns them into skyfield Time objects
+#rise is nan when the satellite is already up at the start and set is nan when it is still up at the end
+pass_dtype = np.dtype([
+    ("station", "i4"), #index into stations
+    ("satellite", "i4"), #index into satellites
+    ("rise", "f8"),
+    ("culmination", "f8"),
+    ("set", "f8"),
+    ("max_elevation", "f8") #degrees
+])
+
+seconds_per_day = 86400.0
+
+
+#Elevation in degrees of ITRS satellite positions rs (..., 3) from stations at positions with local vertical up
+def _elevation(rs, positions, up):
+    los = rs - positions
+    return np.degrees(np.arcsin(np.einsum('...i,...i->...', los, up) / np.sqrt(np.einsum('...i,...i->...', los, los))))
+
+
+#Vectorised false position (Illinois variant) for brackets [a, b] where f changes sign
+#f(tt, index) evaluates the brackets selected by index at times tt
+def find_roots(f, a, b, tol, max_iterations=50):
+
+    a, b = a.copy(), b.copy()
+    index = np.arange(len(a))
+    fa, fb = f(a, index), f(b, index)
+
+    roots = (a + b) / 2
+    active = np.ones(len(a), dtype=bool)
+    side = np.zeros(len(a), dtype=np.int8)
+
+    for n in range(max_iterations):
+        index = np.nonzero(active)[0]
+        if len(index) == 0:
+            break
+
+        ai, bi, fai, fbi = a[index], b[index], fa[index], fb[index]
+        c = np.clip((ai * fbi - bi * fai) / np.where(fbi != fai, fbi - fai, 1.0), ai, bi)
+        fc = f(c, index)
+        roots[index] = c
+
+        #c replaces the end with the same sign, the end kept twice in a row has its value halved
+        left = np.sign(fc) == np.sign(fai)
+        a[index] = np.where(left, c, ai)
+        b[index] = np.where(left, bi, c)
+        fa[index] = np.where(left, fc, np.where(side[index] == -1, fai / 2, fai))
+        fb[index] = np.where(left, np.where(side[index] == 1, fbi / 2, fbi), fc)
+        side[index] = np.where(left, 1, -1)
+
+        #false position steps can be tiny while still far from the root, so the bracket width decides
+        active[index] = ((b[index] - a[index]) > tol) & (fc != 0)
+
+    return roots
+
+
+class PassPredictor:
+
+    def __init__(self, satellites, stations, min_elevation=0.0):
+        self.satellites = list(satellites)
+        self.stations = list(stations)
+        self.min_elevation = min_elevation
+
+        #station ITRS positions and geodetic local verticals, both (G, 3)
+        self.positions = np.array([station.itrs_xyz.km for station in self.stations])
+        lat = np.array([station.latitude.radians for station in self.stations])
+        lon = np.array([station.longitude.radians for station in self.stations])
+        self.up = np.column_stack([np.cos(lat) * np.cos(lon), np.cos(lat) * np.sin(lon), np.sin(lat)])
+
+    #ITRS positions (T, 3) of one satellite at TT Julian dates
+    def satellite_itrs(self, satellite, ts, tt):
+        return satellite.at(ts.tt_jd(tt)).frame_xyz(itrs).km.T
+
+    #Elevation matrix (G, S, T) on a grid of TT Julian dates
+    def elevation_grid(self, ts, tt):
+        elevation = np.empty((len(self.stations), len(self.satellites), len(tt)))
+
+        for s, satellite in enumerate(self.satellites):
+            rs = self.satellite_itrs(satellite, ts, tt)
+            elevation[:, s] = _elevation(rs[None, :, :], self.positions[:, None, :], self.up[:, None, :])
+
+        return elevation
+
+    #Elevation for arbitrary (station, satellite, time) triples, each satellite is evaluated in one call
+    def elevation_at(self, ts, station, satellite, tt):
+        elevation = np.empty(len(tt))
+
+        for s in np.unique(satellite):
+            mask = satellite == s
+            rs = self.satellite_itrs(self.satellites[s], ts, tt[mask])
+            elevation[mask] = _elevation(rs, self.positions[station[mask]], self.up[station[mask]])
+
+        return elevation
+
+    #Predicts every pass between Time t0 and duration_hours later, returns a pass_dtype array
+    #step is the grid spacing in seconds (passes shorter than step can be missed) and tol is in seconds
+    def predict(self, t0, duration_hours=24.0, step=60.0, tol=0.1):
+
+        ts = t0.ts
+        n_steps = int(np.ceil(duration_hours * 3600.0 / step))
+        grid = t0.tt + np.arange(n_steps + 1) * step / seconds_per_day
+        tol = tol / seconds_per_day
+
+        elevation = self.elevation_grid(ts, grid)
+        above = elevation > self.min_elevation
+
+        #(station, satellite, k) of every grid interval [k, k + 1] with a horizon crossing
+        rises = np.nonzero(~above[:, :, :-1] & above[:, :, 1:])
+        sets = np.nonzero(above[:, :, :-1] & ~above[:, :, 1:])
+
+        def crossing(g, s, k):
+            if len(k) == 0:
+                return np.zeros(0)
+            f = lambda tt, index: self.elevation_at(ts, g[index], s[index], tt) - self.min_elevation
+            return find_roots(f, grid[k], grid[k + 1], tol)
+
+        rise_tt = crossing(*rises)
+        set_tt = crossing(*sets)
+
+        #passes already in progress at the start or still in progress at the end
+        up_at_start = np.nonzero(above[:, :, 0])
+        up_at_end = np.nonzero(above[:, :, -1])
+
+        #begin and end grid samples, sorting both by (station, satellite, sample) lines every begin up with its end
+        begin = (np.concatenate([rises[0], up_at_start[0]]), np.concatenate([rises[1], up_at_start[1]]),
+                 np.concatenate([rises[2] + 1, np.zeros(len(up_at_start[0]), dtype=int)]))
+        end = (np.concatenate([sets[0], up_at_end[0]]), np.concatenate([sets[1], up_at_end[1]]),
+               np.concatenate([sets[2], np.full(len(up_at_end[0]), n_steps)]))
+
+        begin_order = np.lexsort(begin[::-1])
+        end_order = np.lexsort(end[::-1])
+
+        passes = np.zeros(len(begin_order), dtype=pass_dtype)
+        passes["station"] = begin[0][begin_order]
+        passes["satellite"] = begin[1][begin_order]
+        passes["rise"] = np.concatenate([rise_tt, np.full(len(up_at_start[0]), np.nan)])[begin_order]
+        passes["set"] = np.concatenate([set_tt, np.full(len(up_at_end[0]), np.nan)])[end_order]
+
+        self._culminations(ts, grid, elevation, passes, begin[2][begin_order], end[2][end_order], tol)
+
+        return passes
+
+    #Highest point of every pass: the best grid sample is refined to where the elevation rate is zero
+    def _culminations(self, ts, grid, elevation, passes, first, last, tol):
+
+        if len(passes) == 0:
+            return
+
+        g, s = passes["station"], passes["satellite"]
+        peak = np.array([f + np.argmax(elevation[gi, si, f:l + 1]) for gi, si, f, l in zip(g, s, first, last)])
+
+        a = grid[np.maximum(peak - 1, 0)]
+        b = grid[np.minimum(peak + 1, len(grid) - 1)]
+        h = 0.5 / seconds_per_day
+
+        def rate(tt, index):
+            return self.elevation_at(ts, g[index], s[index], tt + h) - self.elevation_at(ts, g[index], s[index], tt - h)
+
+        #a peak at either end of the window is not a turning point and keeps its grid time
+        everything = np.arange(len(passes))
+        turning = np.nonzero((rate(a, everything) > 0) & (rate(b, everything) < 0))[0]
+
+        culmination = grid[peak]
+        if len(turning):
+            culmination[turning] = find_roots(lambda tt, index: rate(tt, turning[index]), a[turning], b[turning], tol)
+
+        passes["culmination"] = culmination
+        passes["max_elevation"] = self.elevation_at(ts, g, s, culmination)
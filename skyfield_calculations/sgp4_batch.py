@@ -0,0 +1,103 @@
+import sqlite3
+import numpy as np
+from sgp4.api import Satrec, SatrecArray, SGP4_ERRORS
+from skyfield.sgp4lib import TEME
+from database import db_access
+
+db_path = "satellite_database.db"
+
+#Batch SGP4 for many TLEs at once
+#Every satellite is held in one sgp4 SatrecArray and evaluated on a shared Julian date grid by a single C call,
+#giving (N, T, 3) TEME positions and velocities plus the (N, T) sgp4 error codes (0 means success)
+
+
+class SatelliteSet:
+
+    #records are (norad_id, satellite_name, tle_line1, tle_line2) tuples, as returned by fetch_satellite_tle
+    def __init__(self, records):
+        self.norad_ids = []
+        self.names = []
+        satrecs = []
+
+        for norad_id, satellite_name, line1, line2 in records:
+            try:
+                satrecs.append(Satrec.twoline2rv(line1, line2))
+            except ValueError:
+                print(f"Skipping malformed TLE for NORAD ID {norad_id}")
+                continue
+
+            self.norad_ids.append(norad_id)
+            self.names.append(satellite_name)
+
+        self.norad_ids = np.array(self.norad_ids, dtype=np.int64)
+        self.satrecs = SatrecArray(satrecs) if satrecs else None
+
+    def __len__(self):
+        return len(self.norad_ids)
+
+    #jd and fr are the whole and fractional parts of the UTC Julian dates (kept apart for precision)
+    #returns error codes (N, T) and TEME positions / velocities (N, T, 3) in km and km/s
+    def propagate(self, jd, fr):
+        jd = np.atleast_1d(np.asarray(jd, dtype=float))
+        fr = np.atleast_1d(np.asarray(fr, dtype=float))
+
+        if self.satrecs is None:
+            return np.zeros((0, jd.size), dtype=np.uint8), np.zeros((0, jd.size, 3)), np.zeros((0, jd.size, 3))
+
+        return self.satrecs.sgp4(jd, fr)
+
+    #yields (index, e, r, v) blocks of at most chunk_size grid times, where index slices the time grid,
+    #so a whole catalog over a long grid never needs the full (N, T, 3) arrays in memory at once
+    def propagate_chunks(self, jd, fr, chunk_size=60):
+        jd = np.atleast_1d(np.asarray(jd, dtype=float))
+        fr = np.atleast_1d(np.asarray(fr, dtype=float))
+
+        for start in range(0, jd.size, chunk_size):
+            index = slice(start, min(start + chunk_size, jd.size))
+            yield (index,) + tuple(self.propagate(jd[index], fr[index]))
+
+    #Same as propagate for a skyfield Time array, with positions and velocities rotated into GCRS
+    def propagate_gcrs(self, t):
+        #UTC Julian dates split the same way EarthSatellite.at() does
+        e, r, v = self.propagate(t.whole, t.tai_fraction - t._leap_seconds() / 86400.0)
+        return e, teme2gcrs(r, t), teme2gcrs(v, t)
+
+
+#Builds a SatelliteSet from the newest stored element set of every satellite
+def load_stored_satellites(db_path=db_path):
+
+    try:
+        conn = db_access.get_connection(db_path)
+        c = conn.cursor()
+        c.execute("""SELECT Latest_TLE.norad_id, Satellites.satellite_name, Latest_TLE.tle_line1, Latest_TLE.tle_line2
+                  FROM Latest_TLE
+                  JOIN Satellites ON Latest_TLE.norad_id = Satellites.norad_id
+                  ORDER BY Latest_TLE.norad_id""")
+        records = c.fetchall()
+
+    except sqlite3.Error as e:
+        print(f"Database error: {e}")
+        records = []
+
+    return SatelliteSet(records)
+
+
+#UTC Julian date grid split into whole and fractional parts, start_jd plus every step seconds for duration seconds
+def jd_grid(start_jd, duration, step):
+    whole = np.floor(start_jd - 0.5) + 0.5
+    fr = (start_jd - whole) + np.arange(0.0, duration + step / 2, step) / 86400.0
+    return np.full(fr.size, whole), fr
+
+
+#Rotates (N, T, 3) TEME vectors into GCRS with skyfield's TEME frame for the (T,) Time array t
+def teme2gcrs(vectors, t):
+    R = TEME.rotation_at(t) #(3, 3, T), GCRS to TEME
+    return np.einsum('jit,ntj->nti', R, vectors)
+
+
+#Readable summary of the error codes returned by propagate
+def describe_errors(norad_ids, errors):
+    failed = {}
+    for n, t in zip(*np.nonzero(errors)):
+        failed.setdefault(int(norad_ids[n]), SGP4_ERRORS.get(int(errors[n, t]), f"error {errors[n, t]}"))
+    return failed
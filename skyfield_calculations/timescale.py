@@ -0,0 +1,11 @@
+import functools
+
+#Shared skyfield timescale
+#load.timescale() imports skyfield and parses its bundled leap second and Delta T tables,
+#so it is built once on first use rather than at import time, and every caller gets the same instance
+
+
+@functools.lru_cache(maxsize=None)
+def get_timescale():
+    from skyfield.api import load
+    return load.timescale()
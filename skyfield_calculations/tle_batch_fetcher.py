@@ -0,0 +1,111 @@
+import time
+import threading
+import requests
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from requests.adapters import HTTPAdapter
+from skyfield_calculations import tle_fetcher
+from database import catalog_ingest
+
+#Concurrent multi-ID TLE fetching over pooled keep-alive connections
+#Requests are spread over a thread pool, throttled by a token bucket and retried with exponential backoff
+
+#Status codes worth retrying (rate limited or temporary server problems)
+retry_status_codes = {429, 500, 502, 503, 504}
+
+
+class TokenBucket:
+
+    #rate tokens are added per second, up to capacity tokens can be spent in a burst
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.last = time.monotonic()
+        self.lock = threading.Lock()
+
+    #Blocks until a request is allowed
+    def acquire(self):
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.last) * self.rate)
+            self.last = now
+
+            #the token is reserved straight away so waiting threads queue up in order
+            self.tokens -= 1
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0.0
+
+        if wait > 0:
+            time.sleep(wait)
+
+
+def fetch_with_retry(session, bucket, norad_id, base_url, retries, backoff):
+
+    url = f"{base_url}/NORAD/elements/gp.php?CATNR={norad_id}&FORMAT=tle"
+
+    for attempt in range(retries + 1):
+        bucket.acquire()
+
+        try:
+            response = session.get(url, timeout=10)
+
+            if response.status_code == 200:
+                return tle_fetcher.parse_satellite_tle(norad_id, response.text)
+
+            #Anything other than a temporary failure will not improve by asking again
+            if response.status_code not in retry_status_codes:
+                print(f"NORAD ID {norad_id}: {response.status_code}")
+                return None
+
+        except requests.exceptions.RequestException as e:
+            print(f"Network error for NORAD ID {norad_id}: {e}")
+
+        if attempt < retries:
+            time.sleep(backoff * 2 ** attempt)
+
+    print(f"Giving up on NORAD ID {norad_id} after {retries + 1} attempts")
+    return None
+
+
+#Yields (norad_id, satellite_data) as each request completes, satellite_data matches fetch_satellite_tle
+def fetch_many(norad_ids, max_workers=16, rate=50.0, burst=16, retries=3, backoff=0.5, base_url=tle_fetcher.celestrak_url):
+
+    bucket = TokenBucket(rate, burst)
+
+    with requests.Session() as session:
+
+        #one keep-alive connection per worker
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_workers)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            futures = {pool.submit(fetch_with_retry, session, bucket, norad_id, base_url, retries, backoff): norad_id
+                       for norad_id in norad_ids}
+
+            try:
+                for future in as_completed(futures):
+                    yield futures[future], future.result()
+
+            #Stop queued requests if the caller stops iterating early
+            finally:
+                for future in futures:
+                    future.cancel()
+
+
+#Refreshes a whole watchlist and stores every result in one transaction
+#returns the NORAD IDs that could not be fetched
+def refresh_watchlist(norad_ids, db_path=catalog_ingest.db_path, **fetch_options):
+
+    records = []
+    failed = []
+
+    for norad_id, satellite_data in fetch_many(norad_ids, **fetch_options):
+        if satellite_data:
+            records.append(satellite_data)
+        else:
+            failed.append(norad_id)
+
+    if records:
+        catalog_ingest.store_catalog_tles(records, db_path=db_path)
+
+    return failed
@@ -0,0 +1,115 @@
+import sqlite3
+import threading
+from skyfield_calculations import tle_fetcher
+from database import catalog_ingest, db_access
+
+db_path = "satellite_database.db"
+
+#Read-through cache in front of tle_fetcher.fetch_satellite_tle
+#The newest stored TLE is served while it is younger than ttl seconds, otherwise CelesTrak is asked again
+#Concurrent requests for the same NORAD ID share a single network fetch
+
+
+class TLECache:
+
+    def __init__(self, db_path=db_path, ttl=6 * 3600, fetcher=tle_fetcher.fetch_satellite_tle):
+        self.db_path = db_path
+        self.ttl = ttl
+        self.fetcher = fetcher
+
+        #NORAD ID -> in progress fetch, shared by every caller waiting on it
+        self.lock = threading.Lock()
+        self.in_flight = {}
+
+        #counters
+        self.hits = 0
+        self.misses = 0
+        self.collapsed = 0
+        self.stale_served = 0
+
+    #Newest stored TLE and whether it was retrieved within the ttl
+    def lookup(self, norad_id):
+        try:
+            with db_access.get_connection(self.db_path) as conn:
+                c = conn.cursor()
+                c.execute("""SELECT Satellites.satellite_name, Latest_TLE.tle_line1, Latest_TLE.tle_line2,
+                          Latest_TLE.retrieved_at >= datetime('now', ?)
+                          FROM Latest_TLE
+                          JOIN Satellites ON Latest_TLE.norad_id = Satellites.norad_id
+                          WHERE Latest_TLE.norad_id = ?""", (f"-{int(self.ttl)} seconds", norad_id))
+                row = c.fetchone()
+
+        except sqlite3.Error as e:
+            print(f"Database error: {e}")
+            return None, False
+
+        if row is None:
+            return None, False
+
+        satellite_name, tle_line1, tle_line2, fresh = row
+        return (norad_id, satellite_name, tle_line1, tle_line2), bool(fresh)
+
+    #Same return value as tle_fetcher.fetch_satellite_tle
+    def get(self, norad_id):
+
+        stored, fresh = self.lookup(norad_id)
+
+        if fresh:
+            with self.lock:
+                self.hits += 1
+            return stored
+
+        #Only the first caller for an ID fetches, the rest wait for its result
+        with self.lock:
+            call = self.in_flight.get(norad_id)
+            leader = call is None
+
+            if leader:
+                call = {"done": threading.Event(), "result": None}
+                self.in_flight[norad_id] = call
+                self.misses += 1
+            else:
+                self.collapsed += 1
+
+        if not leader:
+            call["done"].wait()
+            return call["result"]
+
+        try:
+            result = self.fetcher(norad_id)
+
+            if result:
+                catalog_ingest.store_catalog_tles([result], db_path=self.db_path)
+
+            #A stale TLE is still better than nothing when the network is unavailable
+            elif stored:
+                print(f"Using stored TLE for NORAD ID {norad_id}")
+                with self.lock:
+                    self.stale_served += 1
+                result = stored
+
+            call["result"] = result
+            return result
+
+        finally:
+            with self.lock:
+                del self.in_flight[norad_id]
+            call["done"].set()
+
+    def stats(self):
+        lookups = self.hits + self.misses + self.collapsed
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "collapsed": self.collapsed,
+            "stale_served": self.stale_served,
+            "hit_rate": self.hits / lookups if lookups else 0.0
+        }
+
+
+#Shared cache used by the GUI and orbital_calculations
+tle_cache = TLECache()
+
+
+def fetch_satellite_tle(norad_id):
+    return tle_cache.get(norad_id)
@@ -0,0 +1,236 @@
+import numpy as np
+
+#Vectorised TLE catalog parser
+#The whole file is read as one byte buffer, every line becomes a row of a (lines, 69) uint8 matrix and each
+#fixed-width field is decoded for all records at once with digit arithmetic (no per-record dicts or strings)
+#Field names follow tle_fetcher.tle_parser
+
+catalog_dtype = np.dtype([
+    ("satellite_number", "i4"),
+    ("satellite_name", "U24"),
+    ("classification", "U1"),
+    ("international_designator", "U8"),
+    ("epoch_year", "i2"), #four digit year
+    ("epoch_day", "f8"),
+    ("first_derivative", "f8"),
+    ("second_derivative", "f8"),
+    ("bstar_drag", "f8"),
+    ("ephemeris_type", "i1"),
+    ("element_number", "i4"),
+    ("inclination", "f8"),
+    ("right_ascension", "f8"),
+    ("eccentricity", "f8"),
+    ("argument_of_perigee", "f8"),
+    ("mean_anomaly", "f8"),
+    ("mean_motion", "f8"),
+    ("revolution_number", "i4")
+])
+
+line_length = 69
+
+#Alpha-5 catalog numbers use a letter for the leading digit (A = 10 ... Z = 33, skipping I and O)
+alpha5 = np.full(256, -1, dtype=np.int64)
+alpha5[ord('0'):ord('9') + 1] = np.arange(10)
+alpha5[ord(' ')] = 0
+for value, letter in enumerate("ABCDEFGHJKLMNPQRSTUVWXYZ", start=10):
+    alpha5[ord(letter)] = value
+
+space, dot, plus, minus = ord(' '), ord('.'), ord('+'), ord('-')
+
+
+#Digit value of every character (0 for anything else) and which characters are digits or blanks,
+#worked out once per line matrix and shared by every field
+def _decode_digits(rows):
+    values = rows.astype(np.int16) - ord('0')
+    is_digit = (values >= 0) & (values <= 9)
+    return rows, np.where(is_digit, values, 0).astype(np.float64), is_digit | (rows == space)
+
+
+#Digits (blanks count as zero) in columns start:end with an optional fixed decimal point column
+#returns the decoded values and a mask of rows whose characters are valid
+def _fixed_field(line, start, end, point=None):
+
+    rows, digits, digit_or_blank = line
+    columns = [j for j in range(start, end) if j != point]
+
+    valid = digit_or_blank[:, columns].all(axis=1)
+    if point is not None:
+        valid &= rows[:, point] == dot
+
+    if point is None:
+        exponents = [end - 1 - j for j in columns]
+    else:
+        exponents = [point - j - 1 if j < point else point - j for j in columns]
+
+    return digits[:, columns] @ 10.0 ** np.array(exponents), valid
+
+
+def _sign(line, column):
+    chars = line[0][:, column]
+    return np.where(chars == minus, -1.0, 1.0), (chars == space) | (chars == plus) | (chars == minus)
+
+
+#Implied decimal and exponent fields such as " 34779-4" -> 0.34779e-4
+def _exponent_field(line, start):
+    sign, valid_sign = _sign(line, start)
+    mantissa, valid_mantissa = _fixed_field(line, start + 1, start + 6)
+    exponent_sign, valid_exponent_sign = _sign(line, start + 6)
+    exponent, valid_exponent = _fixed_field(line, start + 7, start + 8)
+
+    value = sign * mantissa * 1e-5 * 10.0 ** (exponent_sign * exponent)
+    return value, valid_sign & valid_mantissa & valid_exponent_sign & valid_exponent
+
+
+#Modulo 10 checksum of columns 0-67 (digits count their value and '-' counts as one)
+def _checksum(line):
+    rows, digits, _ = line
+    total = digits[:, :line_length - 1].sum(axis=1) + (rows[:, :line_length - 1] == minus).sum(axis=1)
+    return total % 10
+
+
+#Fixed-width text columns with surrounding blanks removed, non-ASCII bytes become '?' so decoding can never fail
+def _text(rows, start, end):
+    chars = rows[:, start:end]
+    chars = np.where(chars > 127, ord('?'), chars).astype(np.uint8)
+
+    #blanks after the last character become padding, which numpy drops when converting to str
+    blank = (chars == space) | (chars == 0)
+    trailing = np.flip(np.logical_and.accumulate(np.flip(blank, axis=1), axis=1), axis=1)
+    chars[trailing] = 0
+
+    text = np.ascontiguousarray(chars).view(f"S{end - start}").ravel().astype(f"U{end - start}")
+
+    #leading blanks are rare (right aligned names) so only those rows are stripped
+    leading = blank[:, 0] & ~trailing[:, 0]
+    if leading.any():
+        text[leading] = np.char.lstrip(text[leading])
+
+    return text
+
+
+#Decodes a whole TLE/3LE buffer (bytes or str)
+#returns (catalog, errors): a structured array of the valid records and a list of
+#(line_number, message) for every malformed record or stray line, which never aborts the batch
+def parse_catalog(data):
+
+    if isinstance(data, str):
+        data = data.encode("ascii", errors="replace")
+
+    lines = data.splitlines()
+    if not lines:
+        return np.zeros(0, dtype=catalog_dtype), []
+
+    #fixed-width byte matrix, short lines are padded with zero bytes
+    padded = np.array(lines, dtype=f"S{line_length}")
+    rows = padded.view(np.uint8).reshape(len(lines), line_length)
+
+    #a record is a '1 ' line immediately followed by a '2 ' line
+    is_line1 = (rows[:, 0] == ord('1')) & (rows[:, 1] == space)
+    is_line2 = (rows[:, 0] == ord('2')) & (rows[:, 1] == space)
+    starts = np.nonzero(is_line1[:-1] & is_line2[1:])[0]
+
+    #an optional name line sits directly before line 1
+    has_name = np.zeros(len(starts), dtype=bool)
+    has_name[starts > 0] = ~is_line1[starts[starts > 0] - 1] & ~is_line2[starts[starts > 0] - 1]
+
+    errors = []
+
+    #lines that are not part of any record
+    used = np.zeros(len(lines), dtype=bool)
+    used[starts] = True
+    used[starts + 1] = True
+    used[starts[has_name] - 1] = True
+    blank_line = ((rows == space) | (rows == 0)).all(axis=1)
+    for index in np.nonzero(~used & ~blank_line)[0]:
+        errors.append((int(index) + 1, "line is not part of a TLE record"))
+
+    line1 = _decode_digits(rows[starts])
+    line2 = _decode_digits(rows[starts + 1])
+
+    #field decoding for every record at once
+    fields = {}
+    valid = np.ones(len(starts), dtype=bool)
+    checks = []
+
+    def check(mask, message):
+        checks.append((mask, message))
+
+    check((line1[0] != 0).all(axis=1) & (line2[0] != 0).all(axis=1), "line shorter than 69 characters")
+
+    satnum1 = alpha5[line1[0][:, 2]] * 10000 + _fixed_field(line1, 3, 7)[0]
+    satnum2 = alpha5[line2[0][:, 2]] * 10000 + _fixed_field(line2, 3, 7)[0]
+    check((alpha5[line1[0][:, 2]] >= 0) & _fixed_field(line1, 3, 7)[1], "invalid satellite number")
+    check(satnum1 == satnum2, "satellite numbers differ between lines")
+    fields["satellite_number"] = satnum1
+
+    check(_checksum(line1) == line1[0][:, 68].astype(np.int64) - ord('0'), "line 1 checksum mismatch")
+    check(_checksum(line2) == line2[0][:, 68].astype(np.int64) - ord('0'), "line 2 checksum mismatch")
+
+    epoch_year, ok = _fixed_field(line1, 18, 20)
+    check(ok, "invalid epoch year")
+    fields["epoch_year"] = np.where(epoch_year < 57, 2000, 1900) + epoch_year
+
+    decoders = [
+        ("epoch_day", line1, lambda r: _fixed_field(r, 20, 32, point=23)),
+        ("first_derivative", line1, lambda r: _multiply(_sign(r, 33), _fixed_field(r, 35, 43), r[0][:, 34] == dot)),
+        ("second_derivative", line1, lambda r: _exponent_field(r, 44)),
+        ("bstar_drag", line1, lambda r: _exponent_field(r, 53)),
+        ("ephemeris_type", line1, lambda r: _fixed_field(r, 62, 63)),
+        ("element_number", line1, lambda r: _fixed_field(r, 64, 68)),
+        ("inclination", line2, lambda r: _fixed_field(r, 8, 16, point=11)),
+        ("right_ascension", line2, lambda r: _fixed_field(r, 17, 25, point=20)),
+        ("eccentricity", line2, lambda r: _scale(_fixed_field(r, 26, 33), 1e-7)),
+        ("argument_of_perigee", line2, lambda r: _fixed_field(r, 34, 42, point=37)),
+        ("mean_anomaly", line2, lambda r: _fixed_field(r, 43, 51, point=46)),
+        ("mean_motion", line2, lambda r: _fixed_field(r, 52, 63, point=54)),
+        ("revolution_number", line2, lambda r: _fixed_field(r, 63, 68))
+    ]
+
+    for name, source, decode in decoders:
+        values, ok = decode(source)
+        fields[name] = values
+        check(ok, f"invalid {name.replace('_', ' ')}")
+
+    #the first failed check is reported for each bad record
+    reported = np.zeros(len(starts), dtype=bool)
+    for mask, message in checks:
+        bad = ~mask & ~reported
+        for index in np.nonzero(bad)[0]:
+            errors.append((int(starts[index]) + 1, message))
+        reported |= bad
+        valid &= mask
+
+    catalog = np.zeros(int(valid.sum()), dtype=catalog_dtype)
+    for name, values in fields.items():
+        catalog[name] = values[valid]
+
+    catalog["classification"] = _text(line1[0][valid], 7, 8)
+    catalog["international_designator"] = _text(line1[0][valid], 9, 17)
+
+    #names come from the preceding line when present (dropping the 3LE "0 " prefix), otherwise the catalog number is used
+    name_rows = rows[starts - 1]
+    prefixed = (name_rows[:, 0] == ord('0')) & (name_rows[:, 1] == space)
+    name_rows = np.where(prefixed[:, None], np.roll(name_rows, -2, axis=1), name_rows)[:, :24]
+    names = _text(name_rows, 0, 24)
+    if not has_name.all():
+        names[~has_name] = np.char.mod("%05d", satnum1[~has_name].astype(np.int64))
+    catalog["satellite_name"] = names[valid]
+
+    errors.sort()
+    return catalog, errors
+
+
+def _multiply(sign, field, point_ok):
+    (sign_values, sign_ok), (values, ok) = sign, field
+    return sign_values * values * 1e-8, sign_ok & ok & point_ok
+
+
+def _scale(field, factor):
+    values, ok = field
+    return values * factor, ok
+
+
+#Reads and parses a TLE file from disk in one read
+def load_catalog(path):
+    with open(path, "rb") as f:
+        return parse_catalog(f.read())
@@ -1,40 +1,25 @@
 import requests
 import time
+from datetime import datetime, timedelta, timezone
+from instrumentation import metrics
 
-def fetch_satellite_tle(norad_id):
+celestrak_url = "https://celestrak.org"
+
+@metrics.timed("tle_fetch_seconds", "CelesTrak request time", {"request": "satellite"})
+def fetch_satellite_tle(norad_id, session=None, base_url=celestrak_url):
 
     #Built URL that fetches TLE data for any satellite
-    url = f"https://celestrak.org/NORAD/elements/gp.php?CATNR={norad_id}&FORMAT=tle"
+    url = f"{base_url}/NORAD/elements/gp.php?CATNR={norad_id}&FORMAT=tle"
 
 
     try: 
 
-        #Sends a request to CelesTrak with a timeout of 10 seconds
-        response = requests.get(url, timeout=10)
+        #Sends a request to CelesTrak with a timeout of 10 seconds (through a pooled session when one is given)
+        response = (session or requests).get(url, timeout=10)
 
         #Check if the reqeust was sucessful
         if response.status_code == 200:
-            data = response.text.strip()
-
-            #If no data is returned, TLE Data does not exist for this ID and an appropriate message is returned
-            if not data:
-                print("TLE Data not found")
-                return None
-
-            #Split TLE into lines (name, line1, line2)
-            lines = data.split('\n')
-
-            #Checks whether the TLE Data contains at least 3 lines
-            if len(lines) < 3:
-                print("Invalid TLE data format")
-                return None
-
-            satellite_name = lines[0].strip()
-            tle_line1 = lines[1].strip()
-            tle_line2 = lines[2].strip()
-
-            #Returns parsed TLE Data
-            return norad_id, satellite_name, tle_line1, tle_line2
+            return parse_satellite_tle(norad_id, response.text)
 
         #Cathes an invalid request and returns the status code
         else:
@@ -45,9 +30,123 @@ def fetch_satellite_tle(norad_id):
     except requests.exceptions.RequestException as e:
         print(f"Network error: {e}")
         return None
+
+
+#Parses a single CATNR response into (norad_id, satellite_name, tle_line1, tle_line2)
+def parse_satellite_tle(norad_id, text):
+
+    data = text.strip()
+
+    #If no data is returned, TLE Data does not exist for this ID and an appropriate message is returned
+    if not data:
+        print("TLE Data not found")
+        return None
+
+    #Split TLE into lines (name, line1, line2)
+    lines = data.split('\n')
+
+    #Checks whether the TLE Data contains at least 3 lines
+    if len(lines) < 3:
+        print("Invalid TLE data format")
+        return None
+
+    satellite_name = lines[0].strip()
+    tle_line1 = lines[1].strip()
+    tle_line2 = lines[2].strip()
+
+    #Returns parsed TLE Data
+    return norad_id, satellite_name, tle_line1, tle_line2
     
 
 
+#Bulk catalog download, base_url can point at a local stand-in server for offline use
+@metrics.timed("tle_fetch_seconds", "CelesTrak request time", {"request": "catalog"})
+def fetch_catalog_tles(group="active", path=None, base_url=celestrak_url):
+
+    #A local 3LE/TLE file is read directly
+    if path is not None:
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return parse_tle_catalog(f.read())
+
+        except OSError as e:
+            print(f"Could not read TLE file: {e}")
+            return []
+
+    #Whole group files (e.g. GROUP=active) arrive in one request
+    url = f"{base_url}/NORAD/elements/gp.php?GROUP={group}&FORMAT=tle"
+
+    try:
+        response = requests.get(url, timeout=60)
+
+        if response.status_code == 200:
+            return parse_tle_catalog(response.text)
+
+        else:
+            print(response.status_code)
+            return []
+
+    except requests.exceptions.RequestException as e:
+        print(f"Network error: {e}")
+        return []
+
+
+#Parses every record of a 3LE (name line + two element lines) or bare TLE text in one pass
+#returns a list of (norad_id, satellite_name, line1, line2), malformed records are skipped
+def parse_tle_catalog(text):
+
+    lines = [line.rstrip() for line in text.splitlines() if line.strip()]
+    records = []
+    skipped = 0
+
+    i = 0
+    while i < len(lines):
+
+        #Optional name line before the two element lines
+        if lines[i].startswith("1 ") and i + 1 < len(lines) and lines[i + 1].startswith("2 "):
+            name = None
+            line1, line2 = lines[i], lines[i + 1]
+            i += 2
+
+        elif i + 2 < len(lines) and lines[i + 1].startswith("1 ") and lines[i + 2].startswith("2 "):
+            name = lines[i].strip()
+            if name.startswith("0 "):
+                name = name[2:].strip()
+            line1, line2 = lines[i + 1], lines[i + 2]
+            i += 3
+
+        else:
+            skipped += 1
+            i += 1
+            continue
+
+        #Both lines must describe the same satellite
+        norad_id = line1[2:7].strip()
+        if len(line1) < 69 or len(line2) < 69 or norad_id != line2[2:7].strip() or not norad_id.isdigit():
+            skipped += 1
+            continue
+
+        records.append((int(norad_id), name or norad_id, line1, line2))
+
+    if skipped:
+        print(f"Skipped {skipped} malformed TLE lines")
+
+    return records
+
+
+#Epoch of line 1 (YYDDD.DDDDDDDD) in the same ISO format skyfield's utc_iso() gives
+def tle_epoch_iso(tle_line1):
+
+    year = int(tle_line1[18:20])
+    year += 2000 if year < 57 else 1900
+    day_of_year = float(tle_line1[20:32])
+
+    epoch = datetime(year, 1, 1, tzinfo=timezone.utc) + timedelta(days=day_of_year - 1)
+    epoch = (epoch + timedelta(microseconds=500000)).replace(microsecond=0) #round to the nearest second
+
+    return epoch.strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
 #Example TLE:
 #Line 1: 1 25544U 98067A   22001.74462497  .00001435  00000-0  34779-4 0  9992
 #Line 2: 2 25544  51.6464  24.2704 0004064  69.5467 290.6355 15.48835264296862
@@ -0,0 +1,31 @@
+import numpy as np
+from skyfield.api import wgs84
+from propagator import frames
+
+#Run from the repository root with: python -m pytest tests
+#Geodetic points are placed in the Earth fixed frame by skyfield and converted back,
+#from the surface out to geostationary altitude and over the poles
+
+
+def skyfield_points():
+    lats, lons, alts = np.meshgrid(np.linspace(-90.0, 90.0, 13), np.linspace(-180.0, 150.0, 12), [0.0, 0.4, 550.0, 20200.0, 35786.0])
+    lats, lons, alts = lats.ravel(), lons.ravel(), alts.ravel()
+    rs = np.array([wgs84.latlon(lat, lon, elevation_m=alt * 1000.0).itrs_xyz.km for lat, lon, alt in zip(lats, lons, alts)])
+    return lats, lons, alts, rs
+
+
+def test_ecef2geodetic_altitude_matches_skyfield():
+    lats, lons, alts, rs = skyfield_points()
+    lat, lon, alt = frames.ecef2geodetic(rs)
+
+    np.testing.assert_allclose(alt, alts, atol=1e-6) #1 mm
+    np.testing.assert_allclose(lat, lats, atol=1e-9)
+
+
+def test_ecef2geodetic_longitude_matches_skyfield():
+    lats, lons, alts, rs = skyfield_points()
+    lat, lon, alt = frames.ecef2geodetic(rs)
+
+    #longitude is undefined on the poles
+    off_pole = np.abs(lats) < 90.0
+    np.testing.assert_allclose(lon[off_pole], lons[off_pole], atol=1e-9)
@@ -0,0 +1,37 @@
+import numpy as np
+import pytest
+from propagator import n_orbits, planetary_data
+
+#Run from the repository root with: python -m pytest tests
+#States are converted to elements and back, including the circular and equatorial cases
+#where some of the angles are undefined
+
+mu = planetary_data.earth["mu"]
+v_circular = np.sqrt(mu / 7000.0)
+
+states = {
+    "inclined": ([7000.0, 100.0, 1200.0], [-0.5, 7.4, 1.9]),
+    "equatorial": ([7000.0, 100.0, 0.0], [0.0, 7.6, 0.0]),
+    "equatorial retrograde": ([7000.0, 100.0, 0.0], [0.0, -7.6, 0.0]),
+    "circular": ([0.0, 3500.0, 3500.0 * np.sqrt(3.0)], [-v_circular, 0.0, 0.0]),
+    "circular equatorial": ([0.0, -7000.0, 0.0], [v_circular, 0.0, 0.0]),
+}
+
+
+@pytest.mark.parametrize("name", states)
+def test_rv2coes_round_trip(name):
+    r, v = (np.array([x]) for x in states[name])
+    coes = n_orbits.rv2coes_batch(r, v)
+    r2, v2 = n_orbits.coes2rv_batch(coes)
+
+    np.testing.assert_allclose(r2, r, atol=1e-6)
+    np.testing.assert_allclose(v2, v, atol=1e-9)
+
+
+def test_rv2coes_undefined_angles_are_zero():
+    r, v = zip(states["equatorial"], states["circular"])
+    coes = n_orbits.rv2coes_batch(np.array(r), np.array(v))
+
+    #raan of the equatorial orbit, aop of the circular one
+    assert coes[0, 5] == 0.0
+    assert coes[1, 4] == 0.0